@@ -4,8 +4,23 @@
 printf "\n\nContents:\n\n"
 ls
 
-# run cite process
-python3 _cite/cite.py
+# when to run cite process on start:
+# background = serve existing citations right away, update them in background
+# sync = update citations before serving
+CITE_ON_START=${CITE_ON_START:-background}
+
+# seed cite cache with warm cache baked into image, if project has none yet
+CACHE_DIR=${CITE_CACHE_DIR:-_cite/.cache}
+if [ ! -d "${CACHE_DIR}" ] && [ -d /var/cite-cache ]; then
+    printf "\n\nSeeding cite cache from image\n\n"
+    mkdir -p "$(dirname "${CACHE_DIR}")"
+    cp -r /var/cite-cache "${CACHE_DIR}"
+fi
+
+# run cite process before serving, if asked or there are no citations to serve yet
+if [ "${CITE_ON_START}" = "sync" ] || { [ ! -f _data/citations.yaml ] && [ ! -f _data/citation-shards/index.yaml ]; }; then
+    python3 _cite/cite.py
+fi
 
 # run jekyll serve in hot-reload mode
 # rerun whenever _config.yaml changes (jekyll hot-reload doesn't work with this file)
@@ -16,10 +31,8 @@ watchmedo auto-restart \
     -- bundle exec jekyll serve --open-url --force_polling --livereload --trace --host=0.0.0.0 \
     | sed "s/LiveReload address.*//g;s/0.0.0.0/localhost/g" &
 
-# rerun cite process whenever _data files change
-watchmedo shell-command \
-    --debug-force-polling \
-    --recursive \
-    --wait \
-    --command="python3 _cite/cite.py" \
-    --patterns="_data/sources*;_data/orcid*;_data/pubmed*;_data/google-scholar*" \
+# run cite process (first run updates citations while site is served, from
+# cache where possible), then rerun whenever plugin _data files change
+# (only changed data file entries are re-expanded). output files are swapped
+# in whole when done, so jekyll never reads a partial file.
+python3 _cite/cite.py --watch
@@ -0,0 +1,194 @@
+"""
+benchmark cite process stages on synthetic corpora, with local stand-ins for
+metasource apis and manubot. run from project root:
+
+    python _cite/benchmarks/bench.py --sizes 100,1000,10000,50000
+
+each size runs in its own process and temporary folder, with a cold cache.
+results are appended to a json file so they can be compared over time.
+test_bench.py runs every stage on a small corpus, to catch breakage:
+
+    python -m pytest _cite/benchmarks
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+from time import perf_counter
+
+# folders of this suite, and of cite process it benchmarks
+bench_dir = Path(__file__).resolve().parent
+cite_dir = bench_dir.parent
+
+# default output file
+results_file = bench_dir / "results.json"
+
+
+def run_size(size, seed, bulk=False):
+    """
+    run each stage of cite process on synthetic corpus of given size, in
+    current (temporary) folder. returns timings and counts. if bulk, doi
+    metadata is fetched in bulk before citing.
+    """
+
+    from corpus import make_corpus
+    from standin import serve, redirect
+
+    responses, files, metadata = make_corpus(size, seed)
+
+    # orcid plugin needs manubot package itself (not just cli) to run
+    if not find_spec("manubot"):
+        files.pop("orcid.yaml")
+
+    # write data files and manubot stand-in metadata
+    Path("_data").mkdir()
+    for name, contents in files.items():
+        Path("_data", name).write_text(contents)
+    Path("manubot.tsv").write_text(metadata)
+    os.environ["MANUBOT_STUB_DATA"] = str(Path("manubot.tsv").resolve())
+
+    # point plugin requests at local server
+    server = serve(responses)
+    redirect(server)
+
+    # import cite process, with fresh cache in temporary folder
+    os.environ["CITE_CACHE_DIR"] = str(Path(".cache").resolve())
+    sys.path.insert(0, str(cite_dir))
+    import cite
+    import util
+
+    config = cite.Config(root=Path.cwd())
+    result = cite.Result()
+
+    timings = {}
+
+    @contextlib.contextmanager
+    def timed(stage):
+        start = perf_counter()
+        yield
+        timings[stage] = round(perf_counter() - start, 4)
+
+    # run each stage to completion separately, hiding log output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=config.workers) as pool:
+            with timed("compile"):
+                sources = list(cite.run_plugins(config, pool, result))
+        with timed("merge"):
+            merged = list(cite.merge_sources(sources))
+        prefetched = {}
+        if bulk:
+            with timed("bulk doi"), ThreadPoolExecutor(max_workers=config.prefetch_workers) as pool:
+                merged = list(cite.bulk_prefetch(merged, pool, prefetched))
+        with timed("cite"):
+            citations = list(cite.cite_sources(merged, prefetched, result, bulk=bulk))
+        with timed("cite (cached)"):
+            list(cite.cite_sources(merged, {}, result, bulk=bulk))
+        with timed("dedup"):
+            deduped = list(cite.dedup_citations(citations, config, result))
+        with timed("save"):
+            util.save_data("_data/citations.yaml", deduped)
+
+    server.shutdown()
+
+    return {
+        "size": size,
+        "sources": len(sources),
+        "merged": len(merged),
+        "citations": len(citations),
+        "deduped": len(deduped),
+        "errors": len(result.errors),
+        "timings": timings,
+        # kilobytes on linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def commit():
+    """
+    current git commit, if any, to label results with
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=cite_dir
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cite process stages")
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000,50000",
+        help="Comma-separated numbers of sources to benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for corpora")
+    parser.add_argument(
+        "--bulk-doi",
+        action="store_true",
+        help="Fetch DOI metadata in bulk from Crossref/DataCite stand-ins before citing",
+    )
+    parser.add_argument(
+        "--output", default=str(results_file), help="JSON file to append results to"
+    )
+    # internal, run single size in this process
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.child, args.seed, args.bulk_doi)))
+        return
+
+    # manubot stand-in and suite modules take precedence
+    env = dict(os.environ)
+    env["PATH"] = f"{bench_dir}{os.pathsep}{env.get('PATH', '')}"
+    env["PYTHONPATH"] = f"{bench_dir}{os.pathsep}{env.get('PYTHONPATH', '')}"
+
+    results = []
+    for size in map(int, args.sizes.split(",")):
+        print(f"Benchmarking {size} sources...", flush=True)
+        with tempfile.TemporaryDirectory() as folder:
+            process = subprocess.run(
+                [sys.executable, __file__, "--child", str(size), "--seed", str(args.seed)]
+                + (["--bulk-doi"] if args.bulk_doi else []),
+                cwd=folder,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        if process.returncode != 0:
+            print(process.stderr)
+            continue
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        results.append(result)
+        stages = ", ".join(f"{stage} {time:.2f}s" for stage, time in result["timings"].items())
+        print(f"    {stages}, peak {result['peak_rss_mb']} MB")
+
+    # append run to results file
+    output = Path(args.output)
+    runs = json.loads(output.read_text()) if output.is_file() else []
+    runs.append(
+        {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit(),
+            "python": platform.python_version(),
+            "results": results,
+        }
+    )
+    output.write_text(json.dumps(runs, indent=2) + "\n")
+    print(f"Results appended to {output}")
+
+
+if __name__ == "__main__":
+    main()
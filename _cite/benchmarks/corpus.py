@@ -0,0 +1,213 @@
+"""
+synthetic metasource payloads for benchmarking the cite process
+"""
+
+import json
+import random
+import re
+from xml.sax.saxutils import escape
+
+
+# words to build titles, venues and names from
+words = """
+radar lidar occupancy perception mapping odometry learning robust scalable
+efficient multimodal foundation model robot manipulation navigation sensing
+fusion neural implicit scene flow estimation tracking localization wireless
+inertial visual language action policy embodied reasoning dataset benchmark
+adaptive federated edge mobile thermal depth point cloud transformer graph
+""".split()
+venues = ["CVPR", "ICCV", "ECCV", "NeurIPS", "ICRA", "IROS", "RA-L", "T-RO", "SenSys", "MobiCom"]
+given = ["Chris", "Alex", "Sam", "Jia", "Wei", "Maria", "Ahmed", "Yuki", "Priya", "Lars"]
+family = ["Lu", "Smith", "Wang", "Garcia", "Khan", "Sato", "Patel", "Berg", "Chen", "Rossi"]
+
+# author ids used in the generated data files
+dblp_pid = "00/0001"
+orcid_id = "0000-0000-0000-0001"
+pubmed_term = "synthetic lab"
+
+
+def iter_papers(size, seed=0, arxiv_ratio=0.05):
+    """
+    generate synthetic papers one at a time, with some published papers also
+    having an arxiv version under the same title
+    """
+
+    rng = random.Random(seed)
+    count = 0
+    while count < size:
+        index = count
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(6, 12))).capitalize()
+        paper = {
+            "doi": f"10.5555/synthetic.{index}",
+            "title": f"{title} {index}",
+            "authors": [f"{rng.choice(given)} {rng.choice(family)}" for _ in range(rng.randint(2, 8))],
+            "venue": rng.choice(venues),
+            "year": rng.randint(2010, 2026),
+        }
+        yield paper
+        count += 1
+        if rng.random() < arxiv_ratio and count < size:
+            yield dict(paper, doi=f"10.48550/arXiv.{2000 + index % 500}.{index:05d}", venue="CoRR")
+            count += 1
+
+
+def make_papers(size, seed=0, arxiv_ratio=0.05):
+    """
+    make list of synthetic papers (see iter_papers)
+    """
+
+    return list(iter_papers(size, seed, arxiv_ratio))
+
+
+def dblp_xml(papers):
+    """
+    dblp person xml, as returned by https://dblp.org/pid/{pid}.xml
+    """
+
+    records = []
+    for index, paper in enumerate(papers):
+        authors = "".join(f"<author>{escape(name)}</author>" for name in paper["authors"])
+        records.append(
+            f'<r><article key="synthetic/{index}">{authors}'
+            f"<title>{escape(paper['title'])}.</title><year>{paper['year']}</year>"
+            f"<journal>{escape(paper['venue'])}</journal>"
+            f"<ee>https://doi.org/{paper['doi']}</ee></article></r>"
+        )
+    return f'<dblpperson pid="{dblp_pid}">{"".join(records)}</dblpperson>'.encode()
+
+
+def orcid_json(papers):
+    """
+    orcid works json, as returned by https://pub.orcid.org/v3.0/{orcid}/works
+    """
+
+    groups = []
+    for paper in papers:
+        summary = {
+            "external-ids": {
+                "external-id": [
+                    {
+                        "external-id-type": "doi",
+                        "external-id-value": paper["doi"],
+                        "external-id-relationship": "self",
+                    }
+                ]
+            },
+            "title": {"title": {"value": paper["title"]}},
+            "journal-title": {"value": paper["venue"]},
+        }
+        groups.append({"work-summary": [summary]})
+    return json.dumps({"group": groups}).encode()
+
+
+def pubmed_json(pmids):
+    """
+    pubmed esearch json, as returned by eutils esearch.fcgi
+    """
+
+    return json.dumps({"esearchresult": {"idlist": [str(pmid) for pmid in pmids]}}).encode()
+
+
+def crossref_json(papers):
+    """
+    crossref works json for batch doi filter, as returned by
+    https://api.crossref.org/works?filter=doi:...,doi:...
+    """
+
+    by_doi = {paper["doi"].lower(): paper for paper in papers}
+
+    def respond(query):
+        dois = re.findall(r"doi:([^,]+)", " ".join(query.get("filter", [])))
+        items = []
+        for doi in dois:
+            paper = by_doi.get(doi.lower())
+            if not paper:
+                continue
+            items.append(
+                {
+                    "DOI": paper["doi"].lower(),
+                    "title": [paper["title"]],
+                    "author": [
+                        dict(zip(["given", "family"], name.split(" ", 1)))
+                        for name in paper["authors"]
+                    ],
+                    "container-title": [paper["venue"]],
+                    "issued": {"date-parts": [[paper["year"], 1, 1]]},
+                    "URL": f"https://doi.org/{paper['doi']}",
+                }
+            )
+        return json.dumps({"message": {"items": items}}).encode()
+
+    return respond
+
+
+def datacite_json(papers):
+    """
+    datacite dois json for batch doi query, as returned by
+    https://api.datacite.org/dois?query=doi:"..." OR doi:"..."
+    """
+
+    by_doi = {paper["doi"].lower(): paper for paper in papers}
+
+    def respond(query):
+        dois = re.findall(r'doi:"([^"]+)"', " ".join(query.get("query", [])))
+        data = []
+        for doi in dois:
+            paper = by_doi.get(doi.lower())
+            if not paper:
+                continue
+            creators = [
+                dict(zip(["givenName", "familyName"], name.split(" ", 1)))
+                for name in paper["authors"]
+            ]
+            attributes = {
+                "doi": paper["doi"].lower(),
+                "titles": [{"title": paper["title"]}],
+                "creators": creators,
+                "publisher": "arXiv",
+                "publicationYear": paper["year"],
+                "url": f"https://arxiv.org/abs/{paper['doi'].split('.', 2)[-1]}",
+            }
+            data.append({"id": paper["doi"].lower(), "attributes": attributes})
+        return json.dumps({"data": data}).encode()
+
+    return respond
+
+
+def make_corpus(size, seed=0):
+    """
+    split size sources across metasources, with some overlap between dblp and
+    orcid so merging has work to do. returns responses by url path (host and
+    path, without scheme or query) and data files by name.
+    """
+
+    papers = make_papers(size, seed)
+
+    # roughly 60% dblp, 20% orcid (half of it also in dblp), 20% pubmed
+    dblp_count = size * 6 // 10
+    orcid_count = size // 5
+    dblp = papers[:dblp_count]
+    orcid = papers[dblp_count - orcid_count // 2 : dblp_count + orcid_count - orcid_count // 2]
+    pubmed = range(1, size - dblp_count - orcid_count + orcid_count // 2 + 1)
+
+    responses = {
+        f"dblp.org/pid/{dblp_pid}.xml": dblp_xml(dblp),
+        f"pub.orcid.org/v3.0/{orcid_id}/works": orcid_json(orcid),
+        "eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi": pubmed_json(pubmed),
+        "api.crossref.org/works": crossref_json(papers),
+        "api.datacite.org/dois": datacite_json(papers),
+    }
+
+    files = {
+        "dblp.yaml": f'- author_id: "{dblp_pid}"\n',
+        "orcid.yaml": f'- orcid: "{orcid_id}"\n',
+        "pubmed.yaml": f'- term: "{pubmed_term}"\n',
+        "sources.yaml": f"- id: doi:{papers[0]['doi']}\n  image: images/works/example.png\n",
+    }
+
+    # metadata manubot stand-in returns for each citable id
+    metadata = [f"doi:{p['doi']}\t{p['title']}\t{p['venue']}\t{p['year']}" for p in papers]
+    metadata += [f"pubmed:{pmid}\tSynthetic pubmed record {pmid}\tSynthetic Journal\t2020" for pmid in pubmed]
+    metadata = "\n".join(metadata) + "\n"
+
+    return responses, files, metadata
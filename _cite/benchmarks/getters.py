@@ -0,0 +1,63 @@
+"""
+micro-benchmark of per-call overhead of nested field access, comparing the
+original get_safe (parse path on every call), current get_safe (cached
+compiled path), and compiled getters used directly. run from project root:
+
+    python _cite/benchmarks/getters.py
+"""
+
+import sys
+from pathlib import Path
+from timeit import repeat
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from util import get_safe, getter, load_data
+
+
+def get_safe_original(item, path, default=None):
+    """
+    get_safe as it was before compiled getters, for comparison
+    """
+
+    for part in str(path).split("."):
+        try:
+            part = int(part)
+        except ValueError:
+            part = part
+        try:
+            item = item[part]
+        except (KeyError, IndexError, AttributeError, TypeError):
+            return default
+    return item
+
+
+def main():
+    # realistic citation dicts, plus an orcid-like nested record
+    citations = load_data("_data/citations.yaml")
+    work = {"work-summary": [{"title": {"title": {"value": "Example"}}}]}
+
+    # (label, item list, path) cases to time
+    cases = [
+        ("plain key, present", citations, "title"),
+        ("plain key, missing", citations, "remove"),
+        ("nested path", [work] * len(citations), "work-summary.0.title.title.value"),
+    ]
+
+    print(f"{'case':<22}{'original':>12}{'get_safe':>12}{'compiled':>12}  (ns per call)")
+    for label, items, path in cases:
+        compiled = getter(path)
+        variants = [
+            lambda: [get_safe_original(item, path, "") for item in items],
+            lambda: [get_safe(item, path, "") for item in items],
+            lambda: [compiled(item, "") for item in items],
+        ]
+        timings = []
+        for variant in variants:
+            best = min(repeat(variant, number=200, repeat=5))
+            timings.append(best / (200 * len(items)) * 1e9)
+        print(f"{label:<22}" + "".join(f"{ns:>12.0f}" for ns in timings))
+
+
+if __name__ == "__main__":
+    main()
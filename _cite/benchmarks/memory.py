@@ -0,0 +1,181 @@
+"""
+check peak memory of full cite process as number of sources grows, in
+bounded-memory mode (see Config.bounded) and in-memory mode. run from
+project root:
+
+    python _cite/benchmarks/memory.py --sizes 5000,50000 [--modes bounded,in-memory]
+
+sources come from a synthetic plugin that streams papers (with complete
+metadata, so manubot isn't needed) from a generator. each size and mode runs
+in its own process and temporary folder. exits with error if peak memory of
+bounded-memory mode grows more than tolerance from smallest to largest size.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import types
+from pathlib import Path
+from time import perf_counter
+
+# folders of this suite, and of cite process it benchmarks
+bench_dir = Path(__file__).resolve().parent
+cite_dir = bench_dir.parent
+
+
+def synthetic_plugin():
+    """
+    plugin module that streams synthetic papers from generator, for entry
+    with size and seed
+    """
+
+    from corpus import iter_papers
+
+    def main(entry):
+        for paper in iter_papers(entry["size"], entry["seed"]):
+            yield {
+                "id": f"doi:{paper['doi']}",
+                "metadata": {
+                    "title": paper["title"],
+                    "authors": paper["authors"],
+                    "publisher": paper["venue"],
+                    "date": f"{paper['year']}-01-01",
+                    "link": f"https://doi.org/{paper['doi']}",
+                },
+            }
+
+    module = types.ModuleType("plugins.synthetic")
+    module.main = main
+    return module
+
+
+def run_size(size, seed, bounded):
+    """
+    run full cite process on synthetic plugin entry of given size, in current
+    (temporary) folder. returns time, output size, and peak memory.
+    """
+
+    Path("_data").mkdir()
+    Path("_data/synthetic.yaml").write_text(f"- size: {size}\n  seed: {seed}\n")
+
+    # import cite process, with fresh cache in temporary folder
+    os.environ["CITE_CACHE_DIR"] = str(Path(".cache").resolve())
+    sys.path.insert(0, str(cite_dir))
+    import cite
+
+    sys.modules["plugins.synthetic"] = synthetic_plugin()
+
+    config = cite.Config(
+        root=Path.cwd(),
+        plugins=["synthetic"],
+        trust_metadata=True,
+        link_members=False,
+        bounded=bounded,
+        log_mode="plain",
+    )
+
+    start = perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = cite.build_citations(config)
+    seconds = round(perf_counter() - start, 2)
+
+    output = Path(config.output_file)
+    with open(output, encoding="utf8") as file:
+        citations = sum(1 for line in file if line.startswith("- "))
+
+    return {
+        "size": size,
+        "mode": "bounded" if bounded else "in-memory",
+        "citations": citations,
+        "errors": len(result.errors),
+        "seconds": seconds,
+        "output_mb": round(output.stat().st_size / 1024 / 1024, 1),
+        # kilobytes on linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def measure(size, seed=0, bounded=True):
+    """
+    run size and mode in its own process and temporary folder, so peak memory
+    is its own. returns results of run_size.
+    """
+
+    # suite modules take precedence
+    env = dict(os.environ)
+    env["PYTHONPATH"] = f"{bench_dir}{os.pathsep}{env.get('PYTHONPATH', '')}"
+
+    with tempfile.TemporaryDirectory() as folder:
+        process = subprocess.run(
+            [sys.executable, __file__, "--child", str(size), "--seed", str(seed)]
+            + (["--bounded"] if bounded else []),
+            cwd=folder,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if process.returncode != 0:
+        raise Exception(process.stderr)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check peak memory of cite process as input grows")
+    parser.add_argument(
+        "--sizes",
+        default="5000,50000",
+        help="Comma-separated numbers of sources to run",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for corpora")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed growth of bounded-memory peak from smallest to largest size (fraction)",
+    )
+    parser.add_argument(
+        "--modes",
+        default="bounded",
+        help="Comma-separated modes to run (bounded, in-memory). in-memory is slow for large sizes.",
+    )
+    # internal, run single size and mode in this process
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--bounded", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.child, args.seed, args.bounded)))
+        return
+
+    peaks = {}
+    for mode in args.modes.split(","):
+        for size in map(int, args.sizes.split(",")):
+            print(f"Running {size} sources, {mode}...", flush=True)
+            try:
+                result = measure(size, args.seed, mode == "bounded")
+            except Exception as e:
+                print(e)
+                sys.exit(1)
+            peaks.setdefault(mode, []).append(result["peak_rss_mb"])
+            print(
+                f"    {result['citations']} citation(s), {result['output_mb']} MB output, "
+                f"{result['seconds']}s, peak {result['peak_rss_mb']} MB"
+            )
+
+    # bounded-memory peak should stay flat as input grows
+    if "bounded" in peaks:
+        low, high = peaks["bounded"][0], peaks["bounded"][-1]
+        growth = high / low - 1
+        print(f"Bounded-memory peak grew {growth:.0%} ({low} MB to {high} MB)")
+        if growth > args.tolerance:
+            print(f"More than {args.tolerance:.0%} allowed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
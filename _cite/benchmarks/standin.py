@@ -0,0 +1,63 @@
+"""
+local http stand-in for metasource apis, for benchmarking the cite process
+"""
+
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import parse_qs, urlsplit
+
+
+def serve(responses):
+    """
+    serve canned responses by url path (host and path) on a local port, in the
+    background. responses may also be functions of query parameters, for apis
+    that answer batch queries. returns running server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            body = responses.get(url.path.lstrip("/"))
+            if callable(body):
+                body = body(parse_qs(url.query))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        # keep benchmark output clean
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def redirect(server):
+    """
+    send all https requests made with urlopen to local server instead, so
+    plugins can run unmodified
+    """
+
+    host, port = server.server_address
+
+    class StandIn(urllib.request.BaseHandler):
+        # run before default https handler
+        handler_order = 100
+
+        def https_open(self, request):
+            url = urlsplit(request.full_url)
+            local = f"http://{host}:{port}/{url.netloc}{url.path}"
+            if url.query:
+                local += f"?{url.query}"
+            return urllib.request.urlopen(
+                urllib.request.Request(local, headers=dict(request.header_items())),
+                timeout=request.timeout,
+            )
+
+    urllib.request.install_opener(urllib.request.build_opener(StandIn))
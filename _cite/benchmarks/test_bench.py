@@ -0,0 +1,26 @@
+"""
+smoke test of benchmark suite (see bench.py), so it doesn't silently break
+as cite process changes. runs every stage on small synthetic corpus, offline,
+with local api stand-ins and manubot stub. run from project root:
+
+    python -m pytest _cite/benchmarks
+"""
+
+import os
+import bench
+
+
+def test_run_size(tmp_path, monkeypatch):
+    # run in temporary folder, with manubot stub first on path, restoring env after
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PATH", f"{bench.bench_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("CITE_CACHE_DIR", str(tmp_path / ".cache"))
+    monkeypatch.setenv("MANUBOT_STUB_DATA", "")
+
+    result = bench.run_size(100, 0)
+
+    assert result["errors"] == 0
+    assert result["merged"] <= result["sources"]
+    assert 0 < result["deduped"] <= result["citations"]
+    assert list(result["timings"]) == ["compile", "merge", "cite", "cite (cached)", "dedup", "save"]
+    assert (tmp_path / "_data" / "citations.yaml").is_file()
@@ -0,0 +1,21 @@
+"""
+check that bounded-memory mode keeps peak memory flat as input grows 10x
+(see memory.py). run from project root:
+
+    python -m pytest _cite/benchmarks
+"""
+
+from memory import measure
+
+# allowed growth of bounded-memory peak from smaller to larger size (fraction).
+# in-memory mode grows about 40% over same sizes.
+tolerance = 0.25
+
+
+def test_bounded_peak_stays_flat():
+    small = measure(1000, bounded=True)
+    large = measure(10000, bounded=True)
+
+    assert small["errors"] == large["errors"] == 0
+    assert large["citations"] > 5 * small["citations"]
+    assert large["peak_rss_mb"] <= small["peak_rss_mb"] * (1 + tolerance)
@@ -0,0 +1,211 @@
+"""
+bulk doi metadata, many dois per request, from crossref (and datacite, for
+arxiv dois, which crossref doesn't have). converted to citation data like
+manubot gives and cached separately from manubot's own results, so cite
+process doesn't have to run manubot once per doi.
+"""
+
+import json
+import os
+import re
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from util import *
+
+
+# apis to query
+crossref_endpoint = "https://api.crossref.org/works"
+datacite_endpoint = "https://api.datacite.org/dois"
+
+# doi prefixes registered with datacite rather than crossref
+datacite_prefixes = ["10.48550/"]
+
+# dois to query per request, to keep urls short
+batch_size = 50
+
+# seconds to keep bulk citations in cache
+bulk_expire = manubot_expire
+
+
+def bulk_key(_id):
+    """
+    cache key of citation data got in bulk for source id, apart from
+    manubot's, as it isn't exactly what manubot gives
+    """
+
+    return ("bulk", _id)
+
+
+def doi_url(doi):
+    """
+    link to doi, as manubot gives when it can't get a shortdoi (getting one
+    takes a request per doi)
+    """
+
+    return f"https://doi.org/{doi}" if doi else ""
+
+
+def parse_doi(_id):
+    """
+    get doi from source id (e.g. "doi:10.1109/..."), if it's a regular doi
+    """
+
+    _id = str(_id or "").strip()
+    if not _id.lower().startswith("doi:"):
+        return ""
+    doi = _id[len("doi:") :].strip()
+    # short dois (e.g. "doi:g946zk") need resolving first, and commas would
+    # break crossref filter
+    if not doi.startswith("10.") or "," in doi:
+        return ""
+    return doi
+
+
+def first(value):
+    """
+    first item of value if list (as crossref gives titles), otherwise value
+    """
+
+    if isinstance(value, list):
+        return value[0] if value else ""
+    return value or ""
+
+
+def crossref_csl(item):
+    """
+    convert crossref work to csl-json item, with fields manubot citations use
+    """
+
+    return {
+        "title": first(get_safe(item, "title", "")),
+        "author": get_safe(item, "author", []),
+        "container-title": first(get_safe(item, "container-title", "")),
+        "publisher": get_safe(item, "publisher", ""),
+        "issued": get_safe(item, "issued", {}),
+        "URL": doi_url(get_safe(item, "DOI", "")),
+    }
+
+
+def datacite_csl(item):
+    """
+    convert datacite doi record to csl-json item, with fields manubot citations use
+    """
+
+    attributes = get_safe(item, "attributes", {})
+
+    # main title, not subtitle/translated title
+    titles = get_safe(attributes, "titles", [])
+    title = next((t for t in titles if not t.get("titleType")), first(titles)) or {}
+
+    # people only, as manubot only keeps authors with given/family names
+    authors = []
+    for creator in get_safe(attributes, "creators", []):
+        given = get_safe(creator, "givenName", "")
+        family = get_safe(creator, "familyName", "")
+        if given or family:
+            authors.append({"given": given, "family": family})
+
+    # issued date, falling back to just year
+    issued = next(
+        (d.get("date", "") for d in get_safe(attributes, "dates", []) if d.get("dateType") == "Issued"),
+        "",
+    )
+    parts = [int(part) for part in re.findall(r"\d+", issued)[:3]]
+    if not parts and get_safe(attributes, "publicationYear", ""):
+        parts = [int(get_safe(attributes, "publicationYear", ""))]
+
+    # newer api versions give publisher as object
+    publisher = get_safe(attributes, "publisher", "")
+    if isinstance(publisher, dict):
+        publisher = get_safe(publisher, "name", "")
+
+    return {
+        "title": get_safe(title, "title", ""),
+        "author": authors,
+        "container-title": get_safe(attributes, "container.title", ""),
+        "publisher": publisher,
+        "issued": {"date-parts": [parts]} if parts else {},
+        "URL": doi_url(get_safe(attributes, "doi", "")),
+    }
+
+
+def query_crossref(dois):
+    """
+    get csl items of batch of dois from crossref, by lowercase doi
+    """
+
+    params = {
+        "filter": ",".join(f"doi:{doi}" for doi in dois),
+        "rows": len(dois),
+    }
+    # identify to crossref's "polite" pool, if email given
+    if os.environ.get("CROSSREF_MAILTO"):
+        params["mailto"] = os.environ["CROSSREF_MAILTO"]
+
+    request = Request(url=f"{crossref_endpoint}?{urlencode(params)}")
+    response = json.loads(urlopen(request, timeout=request_timeout).read())
+
+    items = get_safe(response, "message.items", [])
+    return {str(get_safe(item, "DOI", "")).lower(): crossref_csl(item) for item in items}
+
+
+def query_datacite(dois):
+    """
+    get csl items of batch of dois from datacite, by lowercase doi
+    """
+
+    params = {
+        "query": " OR ".join(f'doi:"{doi.lower()}"' for doi in dois),
+        "page[size]": len(dois),
+    }
+
+    request = Request(url=f"{datacite_endpoint}?{urlencode(params)}")
+    response = json.loads(urlopen(request, timeout=request_timeout).read())
+
+    items = get_safe(response, "data", [])
+    return {
+        str(get_safe(item, "attributes.doi", "") or get_safe(item, "id", "")).lower(): datacite_csl(item)
+        for item in items
+    }
+
+
+def bulk_cite(ids):
+    """
+    get citation data for source ids with dois in bulk, and store it in cache
+    under bulk_key. returns ids resolved. failed requests and dois not found
+    are left for manubot.
+    """
+
+    # group ids by which api has their dois
+    groups = {"Crossref": {}, "DataCite": {}}
+    for _id in ids:
+        doi = parse_doi(_id)
+        if not doi:
+            continue
+        datacite = any(doi.lower().startswith(prefix) for prefix in datacite_prefixes)
+        groups["DataCite" if datacite else "Crossref"].setdefault(doi.lower(), []).append(_id)
+
+    resolved = []
+    queries = {"Crossref": query_crossref, "DataCite": query_datacite}
+    for name, by_doi in groups.items():
+        dois = list(by_doi)
+        for start in range(0, len(dois), batch_size):
+            batch = dois[start : start + batch_size]
+            try:
+                items = queries[name](batch)
+            except Exception as e:
+                log(e, indent=2, level="WARNING")
+                continue
+
+            for doi in batch:
+                item = items.get(doi)
+                if not item or not get_safe(item, "title", ""):
+                    continue
+                for _id in by_doi[doi]:
+                    citation = csl_citation(_id, item)
+                    cache.set(bulk_key(_id), citation, expire=bulk_expire)
+                    resolved.append(_id)
+
+            log(f"{min(start + batch_size, len(dois))} of {len(dois)} DOI(s) queried from {name}", indent=2)
+
+    return resolved
@@ -1,32 +1,32 @@
 """
-cite process to convert sources and metasources into full citations
+cite process to convert sources and metasources into full citations.
+run as script from project root, or import and call build_citations.
 """
 
+import argparse
+import json
 import re
 import traceback
+from collections.abc import Iterator
+from time import monotonic, sleep
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from dataclasses import dataclass, field, replace
 from importlib import import_module
 from pathlib import Path
 from dotenv import load_dotenv
 from util import *
+from bulk import bulk_cite, bulk_key, parse_doi
+from fuzzy import remove_fuzzy_duplicates
+from members import MemberIndex
+from render import build_fragments, load_fragments
+from search import build_search_index, load_search_index, save_search_index
+from spill import IndexStore, ShingleIndex, SpillStore
 
 
-def is_arxiv_paper(citation):
-    """
-    Check if a citation is an arXiv/preprint paper.
-    Based on bibtex-to-manubot deduplication logic.
-    """
-    _id = get_safe(citation, "id", "").lower()
-    publisher = get_safe(citation, "publisher", "").lower()
-    link = get_safe(citation, "link", "").lower()
-
-    # Check various indicators of arXiv papers
-    if "arxiv" in _id:
-        return True
-    if publisher in ["arxiv", "corr"]:
-        return True
-    if "arxiv.org" in link:
-        return True
-    return False
+# compiled getters for source fields read in hot loops (others from util)
+get_remove = getter("remove")
+get_plugin = getter("plugin")
+get_file = getter("file")
 
 
 def normalize_title(title):
@@ -82,11 +82,11 @@ def remove_arxiv_duplicates(citations, min_overlap=6):
 
     # Compare each arXiv paper with non-arXiv papers
     for arxiv_paper in arxiv_papers:
-        arxiv_title = get_safe(arxiv_paper, "title", "")
-        arxiv_id = get_safe(arxiv_paper, "id", "")
+        arxiv_title = get_title(arxiv_paper, "")
+        arxiv_id = get_id(arxiv_paper, "")
 
         for published_paper in non_arxiv_papers:
-            published_title = get_safe(published_paper, "title", "")
+            published_title = get_title(published_paper, "")
 
             overlap = find_title_overlap(arxiv_title, published_title, min_overlap)
 
@@ -99,7 +99,7 @@ def remove_arxiv_duplicates(citations, min_overlap=6):
     # Filter out duplicates
     filtered_citations = [
         c for c in citations
-        if get_safe(c, "id", "") not in arxiv_ids_to_remove
+        if get_id(c, "") not in arxiv_ids_to_remove
     ]
 
     removed_count = len(citations) - len(filtered_citations)
@@ -109,208 +109,1474 @@ def remove_arxiv_duplicates(citations, min_overlap=6):
     return filtered_citations
 
 
-# load environment variables
-load_dotenv()
+@dataclass
+class Config:
+    """
+    options for cite process
+    """
 
+    # project folder containing _data folder
+    root: Path = field(default_factory=Path.cwd)
+
+    # output citations file, relative to root
+    output_file: str = "_data/citations.yaml"
+
+    # in-order list of plugins to run
+    plugins: list = field(
+        default_factory=lambda: ["google-scholar", "pubmed", "orcid", "dblp", "sources"]
+    )
+
+    # number of plugin entries to expand at once, and seconds to wait on each
+    workers: int = 8
+    timeout: float = 120
+
+    # number of manubot runs to keep going in the background
+    prefetch_workers: int = 4
+
+    # whether to get metadata of uncached dois from crossref/datacite in bulk
+    # before citing, instead of running manubot for each. see bulk_prefetch.
+    bulk_doi: bool = False
+
+    # whether to build citations from complete metadata plugins give along
+    # with ids (e.g. dblp), instead of running manubot on them. see cite_sources.
+    trust_metadata: bool = False
+
+    # log output mode ("auto", "rich", "plain", or "progress") and verbosity
+    # (deepest log indent to show, none for mode default). see configure_log.
+    log_mode: str = "auto"
+    verbosity: int = None
+
+    # whether to write citations in stable sorted order
+    canonical: bool = False
+
+    # whether to also remove citations with near-duplicate titles, minimum
+    # title similarity (0 to 1) to count as duplicate, and json file to write
+    # audit report of clusters found to, relative to root, if any
+    fuzzy_dedup: bool = False
+    fuzzy_threshold: float = 0.8
+    fuzzy_report: str = ""
+
+    # json file to write change-set to, relative to root, if any
+    changes_file: str = ""
+
+    # whether to note which lab members authored each citation (author names
+    # are left as published), and folder of member files
+    link_members: bool = False
+    members_dir: str = "_members"
+
+    # plugins to also run on entries derived from members' front matter (e.g.
+    # dblp/orcid/google-scholar entry for each member with that link), on top
+    # of entries in their data files. see MemberIndex.plugin_entries.
+    member_plugins: list = field(default_factory=list)
+
+    # file to write precomputed groupings of citations to (see aggregate_citations),
+    # relative to root, if any
+    index_file: str = "_data/citation-index.yaml"
+
+    # file to write search index of citations to (see search.py), relative to
+    # root, if any. served as is, for site search to fetch.
+    search_index_file: str = "search-index.json"
+
+    # file to write pre-rendered html of citations to (see render.py),
+    # relative to root, if any. site inlines it instead of rendering each
+    # citation with liquid.
+    fragments_file: str = ""
+
+    # whether to keep memory use flat regardless of number of sources, by
+    # streaming plugin results and keeping sources/citations on disk while
+    # merging and deduplicating, instead of in memory. steps that need all
+    # citations at once are skipped. see build_citations.
+    bounded: bool = False
+
+    # grouping of aggregate_citations ("year" or "type") to split citations
+    # into separate data files by, if any, and folder (relative to root) to
+    # write them and their index to. shards replace output file and citation
+    # index, so site only loads citations once. see shard_citations.
+    shard_by: str = ""
+    shard_dir: str = "_data/citation-shards"
+
+
+@dataclass
+class Result:
+    """
+    outcome of cite process
+    """
 
-# save errors/warnings for reporting at end
-errors = []
-warnings = []
+    # final citations, in output order
+    citations: list = field(default_factory=list)
 
-# output citations file
-output_file = "_data/citations.yaml"
+    # change-set compared to previous output, by citation key (id, or title if
+    # no id). added/removed hold full citations, modified holds field deltas.
+    changes: dict = field(
+        default_factory=lambda: {"added": {}, "removed": {}, "modified": {}}
+    )
 
+    # errors/warnings, for reporting at end
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
 
-log()
+    # whether output file was rewritten
+    written: bool = False
 
-log("Compiling sources")
+    # citation keys by member slug, for "papers by member" lookups
+    by_member: dict = field(default_factory=dict)
 
-# compiled list of sources
-sources = []
+    # precomputed groupings of citations (see aggregate_citations). empty in
+    # bounded-memory mode, where index is only streamed to file.
+    index: dict = field(default_factory=dict)
 
-# in-order list of plugins to run
-plugins = ["google-scholar", "pubmed", "orcid", "dblp", "sources"]
+    @property
+    def ok(self):
+        return not self.errors
 
-# loop through plugins
-for plugin in plugins:
-    # convert into path object
-    plugin = Path(f"plugins/{plugin}.py")
+    @property
+    def added(self):
+        return list(self.changes["added"])
 
-    log(f"Running {plugin.stem} plugin")
+    @property
+    def removed(self):
+        return list(self.changes["removed"])
 
-    # get all data files to process with current plugin
-    files = Path.cwd().glob(f"_data/{plugin.stem}*.*")
-    files = list(filter(lambda p: p.suffix in [".yaml", ".yml", ".json"], files))
+    @property
+    def changed(self):
+        return list(self.changes["modified"])
 
-    log(f"Found {len(files)} {plugin.stem}* data file(s)", indent=1)
 
-    # loop through data files
-    for file in files:
-        log(f"Processing data file {file.name}", indent=1)
+# field order for canonical output. other fields follow alphabetically.
+canonical_fields = ["id", "title", "authors", "publisher", "date", "link"]
 
-        # load data from file
-        try:
-            data = load_data(file)
-            # check if file in correct format
-            if not list_of_dicts(data):
-                raise Exception(f"{file.name} data file not a list of dicts")
-        except Exception as e:
-            log(e, indent=2, level="ERROR")
-            errors.append(e)
-            continue
 
-        # loop through data entries
-        for index, entry in enumerate(data):
-            log(f"Processing entry {index + 1} of {len(data)}, {label(entry)}", level=2)
+def data_files(plugin, root="."):
+    """
+    get all data files to process with plugin
+    """
+
+    files = Path(root).glob(f"_data/{plugin}*.*")
+    return sorted(filter(lambda p: p.suffix in [".yaml", ".yml", ".json"], files))
+
+
+def expand_entry(plugin, entry, stream=False):
+    """
+    run plugin on data entry to expand into multiple sources. plugins may
+    return list, or any iterable (e.g. generator) of sources, which is read
+    in full here unless streaming. when streaming, iterators are returned as
+    is, and read (and checked) one source at a time as pipeline pulls them.
+    """
+
+    expanded = import_module(f"plugins.{plugin}").main(entry)
+    if stream and isinstance(expanded, Iterator):
+        return expanded
+    try:
+        expanded = expanded if isinstance(expanded, list) else list(expanded)
+    except TypeError:
+        pass
+    # check that plugin returned correct format
+    if not list_of_dicts(expanded):
+        raise Exception(f"{plugin} plugin didn't return list of dicts")
+    return expanded
+
+
+def start_entry(started, plugin, entry, stream=False):
+    """
+    expand_entry, first noting time plugin started on entry, as entry may
+    wait in queue behind others before that
+    """
+
+    started.append(monotonic())
+    return expand_entry(plugin, entry, stream)
+
+
+def wait_entry(work, timeout, stuck, workers):
+    """
+    wait on plugin run for entry, until timeout after plugin started on it
+    (not after collection got to it), so entries that hang together time out
+    together. runs that timed out can't be stopped, so if all workers are
+    stuck on them for another timeout, entry still queued is cancelled
+    instead. raises TimeoutError either way.
+    """
+
+    while not work.started:
+        running = [run for run in stuck if not run.done()]
+        if len(running) >= workers:
+            latest = max(run.started[0] for run in running)
+            if monotonic() > latest + 2 * timeout and work.cancel():
+                raise TimeoutError()
+        wait([work], timeout=1)
+    return work.result(timeout=max(0, work.started[0] + timeout - monotonic()))
+
+
+def with_meta(sources, plugin, file):
+    """
+    include meta info about sources as they're read
+    """
+
+    for source in sources:
+        if not isinstance(source, dict):
+            raise Exception(f"{plugin} plugin didn't return list of dicts")
+        source["plugin"] = plugin
+        source["file"] = file
+        yield source
+
+
+def schedule_entries(plugin, file, data, pool, reuse, stream=False):
+    """
+    start expanding data entries with plugin on worker pool, unless unchanged
+    since previous run. returns work items in original order.
+    """
+
+    items = []
+    for entry in data:
+        # key to find same entry in previous run
+        key = (plugin, file.name, json.dumps(entry, sort_keys=True, default=str))
 
-            # run plugin on data entry to expand into multiple sources
+        # reuse sources if entry unchanged since previous run, otherwise start plugin
+        if key in reuse:
+            work = None
+        else:
+            started = []
+            work = pool.submit(start_entry, started, plugin, entry, stream)
+            work.started = started
+
+        items.append((entry, key, work))
+
+    return items
+
+
+def schedule_plugins(config, pool, reuse, members=None):
+    """
+    load all plugin data files (and entries derived from members, if member
+    index given) and start expanding their entries on worker pool. returns
+    work items grouped by plugin and file, in original order.
+    """
+
+    jobs = []
+
+    for plugin in config.plugins:
+        files = []
+        for file in data_files(plugin, config.root):
+            # load data from file
             try:
-                expanded = import_module(f"plugins.{plugin.stem}").main(entry)
-                # check that plugin returned correct format
-                if not list_of_dicts(expanded):
-                    raise Exception(f"{plugin.stem} plugin didn't return list of dicts")
-            # catch any plugin error
+                data = load_data(file)
+                # check if file in correct format
+                if not list_of_dicts(data):
+                    raise Exception(f"{file.name} data file not a list of dicts")
             except Exception as e:
-                # log detailed pre-formatted/colored trace
-                print(traceback.format_exc())
-                # log high-level error
-                log(e, indent=3, level="ERROR")
-                errors.append(e)
+                files.append((file, e, []))
                 continue
 
-            # loop through sources
-            for source in expanded:
+            files.append(
+                (file, None, schedule_entries(plugin, file, data, pool, reuse, config.bounded))
+            )
+
+        # entries derived from members, skipping any already in data files
+        if members and plugin in config.member_plugins:
+            listed = {key[2] for _, _, items in files for _, key, _ in items}
+            folder = Path(config.root, config.members_dir)
+            data = [
+                entry
+                for entry in members.plugin_entries(plugin)
+                if json.dumps(entry, sort_keys=True, default=str) not in listed
+            ]
+            if data:
+                files.append(
+                    (folder, None, schedule_entries(plugin, folder, data, pool, reuse, config.bounded))
+                )
+
+        jobs.append((plugin, files))
+
+    return jobs
+
+
+def run_plugins(config, pool, result, expansions=None, members=None, pool_size=None):
+    """
+    run plugins on their data files in parallel on worker pool (of pool_size
+    workers, config.workers if not given), yielding sources in original
+    plugin/file/entry order as each entry is expanded. if expansions dict
+    given, reuse sources from previous run for unchanged entries, and refill
+    it with this run's expansions. if member index given, also run plugins on
+    entries derived from members (see schedule_plugins).
+    """
+
+    # previous run's expansions, by plugin, file, and entry contents
+    reuse = dict(expansions or {})
+    if expansions is not None:
+        expansions.clear()
+
+    log("Compiling sources")
+
+    # fan out all entries up front, then collect in order
+    jobs = schedule_plugins(config, pool, reuse, members)
+
+    # runs that timed out, still taking up workers
+    stuck = []
+
+    # loop through plugins
+    for plugin, files in jobs:
+        # convert into path object
+        plugin = Path(f"plugins/{plugin}.py")
+
+        log(f"Running {plugin.stem} plugin")
+
+        log(f"Found {len(files)} {plugin.stem}* data file(s)", indent=1)
+
+        # loop through data files
+        for file, error, items in files:
+            log(f"Processing data file {file.name}", indent=1)
+
+            # report data file load error
+            if error:
+                log(error, indent=2, level="ERROR")
+                result.errors.append(error)
+                continue
+
+            # loop through data entries
+            entries = progress(items, f"Running {plugin.stem} on {file.name}", len(items))
+            for index, (entry, key, work) in enumerate(entries):
+                log(f"Processing entry {index + 1} of {len(items)}, {label(entry)}", level=2)
+
+                # reuse sources if entry unchanged since previous run
+                if work is None:
+                    log(" (unchanged)", level="INFO", newline=False)
+                    expanded = reuse[key]
+
+                # otherwise, wait on plugin run for entry
+                else:
+                    try:
+                        expanded = wait_entry(work, config.timeout, stuck, pool_size or config.workers)
+                    # give up on hung entry, and move on to next
+                    except TimeoutError:
+                        if work.cancelled():
+                            error = f"{plugin.stem} plugin never ran on {label(entry)}, all workers stuck on timed out entries"
+                        else:
+                            stuck.append(work)
+                            error = f"{plugin.stem} plugin timed out after {config.timeout}s on {label(entry)}"
+                        log(error, indent=3, level="ERROR")
+                        result.errors.append(error)
+                        continue
+                    # catch any plugin error
+                    except Exception as e:
+                        # log detailed pre-formatted/colored trace
+                        print(traceback.format_exc())
+                        # log high-level error
+                        log(e, indent=3, level="ERROR")
+                        result.errors.append(e)
+                        continue
+
+                    # include meta info about sources. streamed results get it
+                    # as they're pulled.
+                    sources = with_meta(expanded, plugin.name, file.name)
+                    expanded = list(sources) if isinstance(expanded, list) else sources
+
+                # only lists can be kept for next run, streams are read once
+                if expansions is not None and isinstance(expanded, list):
+                    expansions[key] = expanded
+
+                # loop through sources
+                count = 0
+                try:
+                    for source in expanded:
+                        if plugin.stem != "sources":
+                            log(label(source), level=3)
+
+                        # pass copy of source on to next stage, as merging modifies it
+                        yield source.copy()
+                        count += 1
+                # catch error in streamed plugin results
+                except Exception as e:
+                    log(e, indent=3, level="ERROR")
+                    result.errors.append(e)
+
                 if plugin.stem != "sources":
-                    log(label(source), level=3)
+                    log(f"{count} source(s)", indent=3)
 
-                # include meta info about source
-                source["plugin"] = plugin.name
-                source["file"] = file.name
 
-                # add source to compiled list
-                sources.append(source)
+# metadata fields a source must have to be cited without manubot
+metadata_fields = ["title", "authors", "publisher", "date"]
 
-            if plugin.stem != "sources":
-                log(f"{len(expanded)} source(s)", indent=3)
 
+def complete_metadata(metadata):
+    """
+    whether metadata plugin gave with source has all fields needed for citation
+    """
 
-log("Merging sources by id")
+    return isinstance(metadata, dict) and all(metadata.get(key) for key in metadata_fields)
 
-# merge sources with matching (non-blank) ids
-for a in range(0, len(sources)):
-    a_id = get_safe(sources, f"{a}.id", "")
-    if not a_id:
-        continue
-    for b in range(a + 1, len(sources)):
-        b_id = get_safe(sources, f"{b}.id", "")
-        if b_id == a_id:
-            log(f"Found duplicate {b_id}", indent=2)
-            sources[a].update(sources[b])
-            sources[b] = {}
-sources = [entry for entry in sources if entry]
 
+def prefetch_citations(sources, pool, prefetched, trust=False, bulk=False):
+    """
+    start citing sources with ids in the background as they stream past, so
+    manubot runs overlap with later plugins still fetching. if trusting
+    metadata, skip sources that won't need manubot. if getting doi metadata
+    in bulk, leave dois to bulk_prefetch.
+    """
 
-log(f"{len(sources)} total source(s) to cite")
+    for source in sources:
+        _id = get_id(source, "").strip()
+        if trust and complete_metadata(get_safe(source, "metadata", None)):
+            yield source
+            continue
+        if bulk and parse_doi(_id):
+            yield source
+            continue
+        if _id and _id not in prefetched:
+            # note whether cached now, before background run fills cache
+            cached = cite_with_manubot.__cache_key__(_id) in cache
+            prefetched[_id] = (cached, pool.submit(cite_with_manubot.__wrapped__, _id))
+        yield source
 
 
-log()
+def bulk_prefetch(sources, pool, prefetched, trust=False):
+    """
+    once sources are merged, get metadata of uncached dois in bulk (see
+    bulk.py), caching it before citing. dois bulk queries couldn't resolve
+    are started with manubot in the background instead.
+    """
 
-log("Generating citations")
+    sources = list(sources)
 
-# list of new citations
-citations = []
+    # unique uncached dois still to cite
+    ids = []
+    for source in sources:
+        _id = get_id(source, "").strip()
+        if get_remove(source, False) == True:
+            continue
+        if trust and complete_metadata(get_safe(source, "metadata", None)):
+            continue
+        if not parse_doi(_id) or _id in prefetched or _id in ids:
+            continue
+        if cite_with_manubot.__cache_key__(_id) not in cache and bulk_key(_id) not in cache:
+            ids.append(_id)
 
+    if ids:
+        log()
+        log(f"Getting metadata of {len(ids)} DOI(s) in bulk")
 
-# loop through compiled sources
-for index, source in enumerate(sources):
-    log(f"Processing source {index + 1} of {len(sources)}, {label(source)}")
+        resolved = set(bulk_cite(ids))
 
-    # if explicitly flagged, remove/ignore entry
-    if get_safe(source, "remove", False) == True:
-        continue
+        # rest left to manubot
+        for _id in ids:
+            if _id not in resolved:
+                prefetched[_id] = (False, pool.submit(cite_with_manubot.__wrapped__, _id))
 
-    # new citation data for source
-    citation = {}
+        log(f"{len(resolved)} resolved, {len(ids) - len(resolved)} left for Manubot", level="INFO")
 
-    # source id
-    _id = get_safe(source, "id", "").strip()
+    yield from sources
 
-    # manubot doesn't work without an id
-    if _id:
-        log("Using Manubot to generate citation", indent=1)
 
-        try:
-            # run manubot and set citation
-            citation = cite_with_manubot(_id)
+# plugins whose source ids are specific to the profile they came from
+profile_id_plugins = ["google-scholar.py"]
+
+
+def merge_key(source, by_title=False):
+    """
+    key to merge sources on. id, or if merging by title (when plugins also run
+    on members' profiles, which list same papers), plugin and title for
+    sources without ids, or from plugins whose ids differ per profile.
+    """
+
+    _id = get_id(source, "")
+    if not by_title or _id and get_safe(source, "plugin", "") not in profile_id_plugins:
+        return _id
+    title = " ".join(normalize_title(get_title(source, "")))
+    return title and f"{get_safe(source, 'plugin', '')}:{title}"
+
+
+def merge_sources(sources, by_title=False):
+    """
+    merge sources with matching (non-blank) ids, keeping first-seen order. if
+    merging by title, sources without ids and google scholar sources are
+    merged on title instead (see merge_key).
+    """
+
+    # merged sources in order, lookup of merged sources by id, and duplicates found
+    merged = []
+    by_id = {}
+    duplicates = []
+
+    # later duplicates may override any earlier source, so merging is a barrier
+    for source in sources:
+        _id = merge_key(source, by_title)
+        if _id and _id in by_id:
+            duplicates.append(_id)
+            by_id[_id].update(source)
+            continue
+        if _id:
+            by_id[_id] = source
+        merged.append(source)
+
+    log()
+
+    log("Merging sources by id")
+
+    for _id in duplicates:
+        log(f"Found duplicate {_id}", indent=2)
+
+    log(f"{len(merged)} total source(s) to cite")
+
+    # next stage cites each as it's pulled, so progress here tracks citing
+    yield from progress(merged, "Generating citations", len(merged))
+
+
+def merge_sources_on_disk(sources, by_title=False):
+    """
+    merge sources like merge_sources, for bounded-memory mode. merged sources
+    are kept on disk by merge key instead of in memory.
+    """
+
+    store = SpillStore()
+    try:
+        duplicates = 0
+        for source in sources:
+            _id = merge_key(source, by_title)
+            merged = store.get(_id) if _id else None
+            if merged is not None:
+                duplicates += 1
+                merged.update(source.items())
+                store.replace(_id, merged)
+                continue
+            store.add(dict(source.items()), _id or None)
+
+        log()
+
+        log("Merging sources by id")
+
+        log(f"Found {duplicates} duplicate(s)", indent=2)
+
+        log(f"{len(store)} total source(s) to cite")
+
+        yield from progress(store, "Generating citations", len(store))
+    finally:
+        store.close()
+
+
+def cite_sources(sources, prefetched, result, trust=False, bulk=False):
+    """
+    generate citation for each source, yielding citations in source order.
+    if trusting metadata, sources with complete metadata from their plugin
+    are cited from it directly, and manubot is only run for the rest, with
+    any fields manubot is missing filled from metadata. if getting doi
+    metadata in bulk, dois got that way (see bulk_prefetch) skip manubot.
+    """
+
+    # loop through merged sources
+    for index, source in enumerate(sources):
+        if index == 0:
+            log()
+            log("Generating citations")
+
+        log(f"Processing source {index + 1}, {label(source)}", depth=1)
+
+        # if explicitly flagged, remove/ignore entry
+        if get_remove(source, False) == True:
+            continue
+
+        # new citation data for source
+        citation = {}
+
+        # source id
+        _id = get_id(source, "").strip()
+
+        # metadata from plugin, only used if trusted, never output
+        metadata = get_safe(source, "metadata", None) if trust else None
+        metadata = metadata if isinstance(metadata, dict) else {}
+        source = {key: value for key, value in source.items() if key != "metadata"}
+
+        # cite from metadata if it has everything needed
+        if _id and complete_metadata(metadata):
+            log("Using metadata from plugin", indent=1)
+            citation = {"id": _id, **metadata}
+
+        # manubot doesn't work without an id
+        elif _id:
+            # doi metadata got in bulk instead, if any, unless manubot has
+            # cited it already
+            bulked = None
+            if bulk and _id not in prefetched and cite_with_manubot.__cache_key__(_id) not in cache:
+                bulked = cache.get(bulk_key(_id))
+
+            if bulked:
+                log("Using DOI metadata got in bulk", indent=1)
+            else:
+                log("Using Manubot to generate citation", indent=1)
+
+            try:
+                if bulked:
+                    log(" (from cache)", level="INFO", newline=False)
+                    citation = bulked
+                # pick up citation started in background, if any
+                elif _id in prefetched:
+                    cached, future = prefetched.pop(_id)
+                    if cached:
+                        log(" (from cache)", level="INFO", newline=False)
+                    citation = future.result()
+                # otherwise, run manubot now
+                else:
+                    citation = cite_with_manubot(_id)
+
+            # if manubot cannot cite source
+            except Exception as e:
+                plugin = get_plugin(source, "")
+                file = get_file(source, "")
+                # if regular source (id entered by user), throw error
+                if plugin == "sources.py":
+                    log(e, indent=3, level="ERROR")
+                    result.errors.append(f"Manubot could not generate citation for source {_id}")
+                # otherwise, if from metasource (id retrieved from some third-party api), just warn
+                else:
+                    log(e, indent=3, level="WARNING")
+                    result.warnings.append(
+                        f"Manubot could not generate citation for source {_id} (from {file} with {plugin})"
+                    )
+                    # discard source from citations
+                    continue
+
+            # fill fields manubot couldn't find from metadata
+            for key, value in metadata.items():
+                if not citation.get(key):
+                    citation[key] = value
+
+        # preserve fields from input source, overriding existing fields
+        citation.update(source)
+
+        # ensure date in proper format for correct date sorting
+        if get_date(citation, ""):
+            citation["date"] = format_date(get_date(citation, ""))
+
+        # pass citation on to next stage
+        yield citation
+
+
+def dedup_citations(citations, config, result):
+    """
+    remove arxiv duplicates, and fuzzy duplicates if enabled, once all
+    citations are known
+    """
+
+    citations = list(citations)
+
+    log()
+
+    log("Removing arXiv duplicates")
+
+    # Remove arXiv papers that have published versions (Smart Deduplication)
+    citations = remove_arxiv_duplicates(citations, min_overlap=6)
+
+    # Remove near-duplicate titles across all citations
+    if config.fuzzy_dedup:
+        log()
 
-        # if manubot cannot cite source
+        log("Removing fuzzy duplicates")
+
+        try:
+            citations = remove_fuzzy_duplicates(
+                citations,
+                threshold=config.fuzzy_threshold,
+                report=Path(config.root) / config.fuzzy_report if config.fuzzy_report else "",
+            )
         except Exception as e:
-            plugin = get_safe(source, "plugin", "")
-            file = get_safe(source, "file", "")
-            # if regular source (id entered by user), throw error
-            if plugin == "sources.py":
-                log(e, indent=3, level="ERROR")
-                errors.append(f"Manubot could not generate citation for source {_id}")
-            # otherwise, if from metasource (id retrieved from some third-party api), just warn
+            log(e, indent=1, level="ERROR")
+            result.errors.append(e)
+
+    log(f"{len(citations)} citation(s) after deduplication")
+
+    yield from citations
+
+
+def dedup_citations_on_disk(citations, config, result, min_overlap=6):
+    """
+    remove arxiv duplicates like dedup_citations, for bounded-memory mode.
+    citations are kept on disk, with titles of published papers indexed on
+    disk by runs of min_overlap words, so each arxiv paper is only looked up
+    by its own runs of words instead of compared to every published title.
+    """
+
+    store = SpillStore()
+    titles = ShingleIndex(min_overlap)
+    try:
+        arxiv, published = 0, 0
+        for citation in citations:
+            store.add(dict(citation.items()))
+            if is_arxiv_paper(citation):
+                arxiv += 1
             else:
-                log(e, indent=3, level="WARNING")
-                warnings.append(
-                    f"Manubot could not generate citation for source {_id} (from {file} with {plugin})"
-                )
-                # discard source from citations
-                continue
+                published += 1
+                title = get_title(citation, "")
+                titles.add(normalize_title(title), title)
+
+        log()
+
+        log("Removing arXiv duplicates")
+
+        log(f"Found {arxiv} arXiv paper(s) and {published} published paper(s)")
+
+        removed = 0
+        for citation in store:
+            if is_arxiv_paper(citation):
+                title = get_title(citation, "")
+                match = titles.match(normalize_title(title))
+                if match is not None:
+                    removed += 1
+                    log(f"Removing arXiv duplicate: '{title[:50]}...'", indent=1)
+                    log(f"  Published version: '{match[:50]}...'", indent=1)
+                    continue
+            yield citation
+
+        if removed > 0:
+            log(f"Removed {removed} arXiv duplicate(s)", level="INFO")
+    finally:
+        store.close()
+        titles.close()
+
+
+def link_members(citations, index, result):
+    """
+    note which lab members authored each citation, and index citations by
+    member. author names are left as published.
+    """
+
+    for citation in citations:
+        slugs = index.find(citation.get("authors") or [])
+        if slugs:
+            citation["members"] = slugs
+            for slug in slugs:
+                result.by_member.setdefault(slug, []).append(citation_key(citation))
+        yield citation
+
+
+def canonicalize(citations):
+    """
+    put citations in stable order with normalized field order, so output only
+    changes where citations actually change, regardless of source order
+    """
+
+    citations = list(citations)
+
+    # sort newest first, ties broken by id and title
+    citations.sort(key=lambda c: (str(get_id(c, "")), str(get_title(c, ""))))
+    citations.sort(key=lambda c: str(get_date(c, "")), reverse=True)
+
+    for citation in citations:
+        # core fields first in fixed order, then any others alphabetically
+        core = [key for key in canonical_fields if key in citation]
+        rest = sorted(key for key in citation if key not in canonical_fields)
+        yield {key: citation[key] for key in core + rest}
+
+
+def announce_save(citations):
+    """
+    log save step once the first citation reaches the output file
+    """
+
+    for index, citation in enumerate(citations):
+        if index == 0:
+            log()
+            log("Saving updated citations")
+        yield citation
+
+
+def citation_key(citation):
+    """
+    key to match citation between runs (id, or title if no id)
+    """
 
-    # preserve fields from input source, overriding existing fields
-    citation.update(source)
+    return str(get_id(citation, "") or get_title(citation, ""))
 
-    # ensure date in proper format for correct date sorting
-    if get_safe(citation, "date", ""):
-        citation["date"] = format_date(get_safe(citation, "date", ""))
 
-    # add new citation to list
-    citations.append(citation)
+def field_deltas(old, new):
+    """
+    get old and new value of each field that differs between two citations
+    """
 
+    return {
+        key: {"old": old.get(key), "new": new.get(key)}
+        for key in list(old) + [key for key in new if key not in old]
+        if old.get(key) != new.get(key)
+    }
 
-log()
 
-log("Removing arXiv duplicates")
+def citation_type(citation):
+    """
+    general type of citation, from its type field, or whether it's a preprint
+    """
 
-# Remove arXiv papers that have published versions (Smart Deduplication)
-citations = remove_arxiv_duplicates(citations, min_overlap=6)
+    return get_safe(citation, "type", "") or ("preprint" if is_arxiv_paper(citation) else "paper")
 
-log(f"{len(citations)} citation(s) after deduplication")
 
+def aggregate_citations(citations):
+    """
+    group citations by year, member, venue, and type, once at cite time, so
+    tools and templates don't have to. groups hold positions of citations in
+    output list (e.g. site.data.citations[position]), newest first. also maps
+    citation keys to positions, to look citations up by id.
+    """
 
-log()
+    # positions newest first, ties in reverse output order, as site's
+    # sort: "date" | reverse always rendered them
+    recent = sorted(
+        range(len(citations)),
+        key=lambda position: (str(get_date(citations[position], "")), position),
+        reverse=True,
+    )
+
+    groups = {"year": {}, "member": {}, "venue": {}, "type": {}}
+    for position in recent:
+        citation = citations[position]
+        # undated citations grouped under empty year, as site always showed them
+        year = str(get_date(citation, ""))[:4]
+        groups["year"].setdefault(year, []).append(position)
+        for slug in get_safe(citation, "members", []):
+            groups["member"].setdefault(slug, []).append(position)
+        venue = str(get_publisher(citation, "")).strip()
+        if venue:
+            groups["venue"].setdefault(venue, []).append(position)
+        groups["type"].setdefault(citation_type(citation), []).append(position)
+
+    return {
+        "total": len(citations),
+        "ids": {citation_key(citation): position for position, citation in enumerate(citations)},
+        "recent": recent,
+        "year": dict(sorted(groups["year"].items(), reverse=True)),
+        "member": dict(sorted(groups["member"].items())),
+        "venue": dict(sorted(groups["venue"].items(), key=lambda item: item[0].casefold())),
+        "type": dict(sorted(groups["type"].items())),
+    }
+
+
+def summarize_citations(citations, store):
+    """
+    note what each citation is grouped by in on-disk store as it passes to
+    output, for bounded-memory mode (see aggregate_citations_on_disk)
+    """
 
-log("Saving updated citations")
+    for citation in citations:
+        store.add(
+            citation_key(citation),
+            str(get_date(citation, "")),
+            str(get_publisher(citation, "")).strip(),
+            citation_type(citation),
+            get_safe(citation, "members", []),
+        )
+        yield citation
 
 
-# save new citations
-try:
-    save_data(output_file, citations)
-except Exception as e:
-    log(e, level="ERROR")
-    errors.append(e)
+def aggregate_citations_on_disk(store):
+    """
+    same groupings as aggregate_citations, from citation summaries in on-disk
+    store. groups are read from disk as index is saved, so it's never held in
+    memory in full.
+    """
+
+    def groups(column, names):
+        return LazyMapping((name, store.positions(column, name)) for name in names)
+
+    venues = [venue for venue in store.names("venue") if venue]
+
+    return {
+        "total": len(store),
+        "ids": LazyMapping(store.keys()),
+        "recent": store.recent(),
+        "year": groups("year", sorted(store.names("year"), reverse=True)),
+        "member": groups("member", sorted(store.names("member"))),
+        "venue": groups("venue", sorted(venues, key=str.casefold)),
+        "type": groups("type", sorted(store.names("type"))),
+    }
+
+
+# groupings citations can be sharded by
+shard_groups = ["year", "type"]
+
+
+def shard_citations(citations, index, by="year"):
+    """
+    split citations into shards by year or type, using groups from
+    aggregate_citations, each shard newest first. returns shards by file name,
+    and index of shards (in group order, with citation counts), of citation
+    keys to shard file name and position in shard, and (if not sharded by
+    year) of years to those, so site never has to regroup shards.
+    """
 
+    if by not in shard_groups:
+        raise Exception(f'Can\'t shard citations by "{by}"')
 
-log()
+    shards = {}
+    shard_index = {"by": by, "total": len(citations), "shards": [], "ids": {}}
 
+    # shard file name and position in shard, by position in citations
+    places = {}
 
-# exit at end, so user can see all errors/warnings in one run
-if len(warnings):
-    log(f"{len(warnings)} warning(s) occurred above", level="WARNING")
-    for warning in warnings:
-        log(warning, indent=1, level="WARNING")
+    for name, positions in index[by].items():
+        # file name safe version of group name, as site looks shards up by it
+        file = re.sub(r"[^\w-]+", "-", str(name)).strip("-") or "unknown"
+        shard = shards.setdefault(file, [])
+        for position in positions:
+            places[position] = [file, len(shard)]
+            shard_index["ids"][citation_key(citations[position])] = places[position]
+            shard.append(citations[position])
+        shard_index["shards"].append({"name": name, "file": file, "count": len(positions)})
+
+    if by != "year":
+        shard_index["year"] = {
+            name: [places[position] for position in positions]
+            for name, positions in index["year"].items()
+        }
+
+    return shards, shard_index
+
+
+def load_shard_index(folder):
+    """
+    load index of shards written to folder before, if any
+    """
+
+    path = Path(folder) / "index.yaml"
+    try:
+        shard_index = load_data(path) if path.is_file() else {}
+    except Exception:
+        return {}
+    return shard_index if isinstance(shard_index, dict) else {}
+
+
+def load_shards(folder):
+    """
+    load citations of all shards written to folder before, in shard order
+    """
+
+    citations = []
+    for shard in load_shard_index(folder).get("shards") or []:
+        try:
+            data = load_data(Path(folder) / f"{get_safe(shard, 'file', '')}.yaml")
+        except Exception:
+            continue
+        if list_of_dicts(data):
+            citations += data
+    return citations
+
+
+def shard_files(folder):
+    """
+    shard files written to folder before, per their index. only those are ever
+    removed, so other files in folder are left alone.
+    """
+
+    folder = Path(folder)
+    files = []
+    for shard in load_shard_index(folder).get("shards") or []:
+        file = str(get_safe(shard, "file", "")) if isinstance(shard, dict) else ""
+        path = folder / f"{file}.yaml"
+        if file and path.parent == folder and path.is_file():
+            files.append(path)
+    return files
+
+
+def save_shards(folder, shards, shard_index, staged=None):
+    """
+    write each shard and shard index to folder, leaving unchanged files
+    untouched. if staged list given, complete files are added to it instead
+    of swapped in (see save_data). returns number of files written, and
+    shard files no longer needed, to remove once new shards are in.
+    """
+
+    folder = Path(folder)
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+    except Exception:
+        raise Exception(f"Can't create shard folder {folder}")
+
+    # shards written last time
+    previous = shard_files(folder)
+
+    written = 0
+    for file, shard in shards.items():
+        written += save_data(folder / f"{file}.yaml", shard, staged)
+    written += save_data(folder / "index.yaml", shard_index, staged)
+
+    # shards of groups that no longer have citations
+    stale = [path for path in previous if path.stem not in shards]
+
+    return written + len(stale), stale
+
+
+def compare_citations(old, new):
+    """
+    get change-set between old and new list of citations: citations added and
+    removed, and field deltas of citations modified, by citation key
+    """
+
+    old = {citation_key(citation): citation for citation in old}
+    new = {citation_key(citation): citation for citation in new}
+
+    return {
+        "added": {key: new[key] for key in new if key not in old},
+        "removed": {key: old[key] for key in old if key not in new},
+        "modified": {
+            key: field_deltas(old[key], new[key])
+            for key in new
+            if key in old and new[key] != old[key]
+        },
+    }
+
+
+def save_changes(path, changes):
+    """
+    write change-set to json file, for other tools to act on
+    """
+
+    try:
+        Path(path).write_text(json.dumps(changes, indent=2, default=str) + "\n")
+    except Exception:
+        raise Exception("Can't write change-set file")
+
+
+def collect(citations, result):
+    """
+    keep final citations on result as they pass to output
+    """
+
+    for citation in citations:
+        result.citations.append(citation)
+        yield citation
+
+
+# options that need all citations in memory at once, and what they do
+unbounded_options = {
+    "canonical": "canonical order",
+    "fuzzy_dedup": "fuzzy deduplication",
+    "bulk_doi": "bulk DOI metadata",
+    "shard_by": "shards",
+    "fragments_file": "HTML fragments",
+    "search_index_file": "search index",
+    "changes_file": "change-set",
+}
+
+
+def bound_config(config):
+    """
+    get copy of config with options that need all citations in memory at
+    once turned off, for bounded-memory mode
+    """
+
+    skipped = [name for option, name in unbounded_options.items() if getattr(config, option)]
+    if skipped:
+        log(f"Bounded-memory mode, skipping {', '.join(skipped)}", level="INFO")
+    return replace(
+        config, **{option: type(getattr(config, option))() for option in unbounded_options}
+    )
+
+
+def build_citations(config=None, expansions=None, previous=None):
+    """
+    run full cite process once, returning result with citations, change-set
+    compared to previous output, and errors/warnings. if expansions dict
+    given, reuse plugin results for unchanged data entries (see run_plugins).
+    if previous citations given, compare against them instead of loading
+    previous output file.
+    """
+
+    config = config or Config()
+    result = Result()
+
+    configure_log(config.log_mode, config.verbosity)
+
+    if config.bounded:
+        config = bound_config(config)
+        previous = []
+
+    # load environment variables
+    load_dotenv()
+
+    output_file = Path(config.root) / config.output_file
+
+    # complete output files, to swap in together once all are written, and
+    # old output files to remove then
+    staged = []
+    stale = []
+    saved = False
+
+    # summaries of citations to index, in bounded-memory mode
+    summaries = None
+
+    # previous output (or shards it was split into), to compare against
+    if previous is None:
+        try:
+            if output_file.is_file():
+                previous = load_data(output_file)
+            else:
+                previous = load_shards(Path(config.root) / config.shard_dir)
+        except Exception:
+            previous = []
+        if not list_of_dicts(previous):
+            previous = []
+
+    # index of lab members
+    members = None
+    if config.link_members or config.member_plugins:
+        try:
+            members = MemberIndex.load(config.root, config.members_dir)
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+
+    log()
+
+    # citations started in background, by id
+    prefetched = {}
+
+    # pool for plugin entries. not waited on at end, so a hung entry can't stall run.
+    # big enough to fetch all member-derived entries at once, as they're mostly
+    # waiting on network.
+    fanout = sum(len(members.plugin_entries(plugin)) for plugin in config.member_plugins) if members else 0
+    pool_size = max(config.workers, fanout)
+    workers = ThreadPoolExecutor(max_workers=pool_size)
+
+    with ThreadPoolExecutor(max_workers=config.prefetch_workers) as pool:
+        # chain of stages, each pulling from the previous as needed
+        sources = run_plugins(config, workers, result, expansions, members, pool_size)
+        # bounded-memory mode cites in order instead, as background runs
+        # would hold results of every source until cited
+        if not config.bounded:
+            sources = prefetch_citations(
+                sources, pool, prefetched, config.trust_metadata, config.bulk_doi
+            )
+        if config.bounded:
+            sources = merge_sources_on_disk(sources, bool(config.member_plugins))
+        else:
+            sources = merge_sources(sources, bool(config.member_plugins))
+        if config.bulk_doi:
+            sources = bulk_prefetch(sources, pool, prefetched, config.trust_metadata)
+        citations = cite_sources(
+            sources, prefetched, result, config.trust_metadata, config.bulk_doi
+        )
+        if config.bounded:
+            citations = dedup_citations_on_disk(citations, config, result)
+        else:
+            citations = dedup_citations(citations, config, result)
+        if members and config.link_members:
+            citations = link_members(citations, members.authors, result)
+        if config.canonical:
+            citations = canonicalize(citations)
+        citations = announce_save(citations)
+        # final citations only kept if steps after saving need them
+        if not config.bounded:
+            citations = collect(citations, result)
+        elif config.index_file:
+            summaries = IndexStore()
+            citations = summarize_citations(citations, summaries)
+
+        # save new citations, pulling everything through the pipeline. file
+        # is only swapped in with its index, as site reads one through other.
+        try:
+            if config.shard_by:
+                # saved as shards instead, once all are in
+                for citation in citations:
+                    pass
+            else:
+                result.written = save_data(output_file, citations, staged)
+                if not result.written:
+                    log("No changes, left file untouched", indent=1, level="INFO")
+            saved = True
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+
+        # don't wait on background runs for sources that were never cited
+        for cached, future in prefetched.values():
+            future.cancel()
+
+    workers.shutdown(wait=False, cancel_futures=True)
+
+    if config.bounded:
+        index = aggregate_citations_on_disk(summaries) if summaries is not None else {}
+    else:
+        result.index = index = aggregate_citations(result.citations)
+
+    # save groupings of citations, for tools and site to read
+    if config.index_file and saved and not config.shard_by:
+        try:
+            save_data(Path(config.root) / config.index_file, index, staged)
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+    if summaries is not None:
+        summaries.close()
+
+    # split citations into shards instead of single output file and index
+    if config.shard_by and saved:
+        try:
+            shards, shard_index = shard_citations(result.citations, result.index, config.shard_by)
+            written, stale = save_shards(
+                Path(config.root) / config.shard_dir, shards, shard_index, staged
+            )
+            # single output file and index, replaced by shards
+            for path in [output_file, Path(config.root) / (config.index_file or "")]:
+                if path.is_file():
+                    stale.append(path)
+            result.written = written > 0
+            log(
+                f"{len(shards)} shard(s) by {config.shard_by}, {written} file(s) updated",
+                indent=1,
+                level="INFO",
+            )
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+
+    # shards from earlier sharded runs, replaced by single output file
+    elif saved:
+        folder = Path(config.root) / config.shard_dir
+        stale += shard_files(folder)
+        if (folder / "index.yaml").is_file():
+            stale.append(folder / "index.yaml")
+
+    # swap in new output files together, then remove old ones
+    try:
+        swap_files(staged)
+        for path in stale:
+            path.unlink()
+    except Exception as e:
+        log(e, level="ERROR")
+        result.errors.append(e)
+
+    # pre-render citation html, only rendering changed citations
+    if config.fragments_file:
+        fragments_file = Path(config.root) / config.fragments_file
+        try:
+            fragments, rendered = build_fragments(
+                result.citations,
+                load_fragments(fragments_file),
+                members.authors if members else None,
+            )
+            save_data(fragments_file, fragments)
+            log(
+                f"Fragments: {len(fragments)} citation(s), {rendered} rendered",
+                indent=1,
+                level="INFO",
+            )
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+
+    # update search index, only retokenizing changed citations
+    if config.search_index_file:
+        search_file = Path(config.root) / config.search_index_file
+        try:
+            search, tokenized = build_search_index(
+                result.citations, load_search_index(search_file)
+            )
+            save_search_index(search_file, search)
+            log(
+                f"Search index: {len(search['tokens'])} token(s), "
+                f"{tokenized} citation(s) reindexed",
+                indent=1,
+                level="INFO",
+            )
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
+
+    result.changes = compare_citations(previous, result.citations)
+
+    log(
+        f"{len(result.added)} added, {len(result.removed)} removed, "
+        f"{len(result.changed)} modified citation(s)",
+        indent=1,
+        level="INFO",
+    )
+
+    # write change-set for other tools
+    if config.changes_file:
+        try:
+            save_changes(Path(config.root) / config.changes_file, result.changes)
+        except Exception as e:
+            log(e, level="ERROR")
+            result.errors.append(e)
 
-if len(errors):
-    log(f"{len(errors)} error(s) occurred above", level="ERROR")
-    for error in errors:
-        log(error, indent=1, level="ERROR")
     log()
-    exit(1)
 
-else:
+    # report at end, so user can see all errors/warnings in one run
+    if len(result.warnings):
+        log(f"{len(result.warnings)} warning(s) occurred above", level="WARNING")
+        for warning in result.warnings:
+            log(warning, indent=1, level="WARNING")
+
+    if len(result.errors):
+        log(f"{len(result.errors)} error(s) occurred above", level="ERROR")
+        for error in result.errors:
+            log(error, indent=1, level="ERROR")
+        log()
+        return result
+
     log("All done!", level="SUCCESS")
+    log()
+    return result
+
+
+def snapshot(config):
+    """
+    get modified times of all plugin data files (and member files, if using
+    members), to detect changes
+    """
+
+    files = [file for plugin in config.plugins for file in data_files(plugin, config.root)]
+    if config.link_members or config.member_plugins:
+        files += sorted(Path(config.root, config.members_dir).glob("**/*.md"))
+
+    return {file: file.stat().st_mtime_ns for file in files}
+
 
-log()
+def watch(config, interval=0.5):
+    """
+    keep running, and rerun cite process whenever plugin data files change
+    """
+
+    # expansions kept between runs, so only changed entries rerun their plugin
+    expansions = {}
+
+    stamps = snapshot(config)
+    citations = build_citations(config, expansions).citations
+
+    log(f"Watching {len(stamps)} data file(s) for changes", level="INFO")
+    log()
+
+    while True:
+        sleep(interval)
+        try:
+            latest = snapshot(config)
+        # file removed between listing and stat, check again next time
+        except FileNotFoundError:
+            continue
+        if latest != stamps:
+            stamps = latest
+            citations = build_citations(config, expansions, citations).citations
+
+
+def main():
+    config = Config()
+
+    parser = argparse.ArgumentParser(
+        description="Generate citations from sources and metasources"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running, and update citations whenever plugin data files change",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.workers,
+        help="Number of plugin data entries to expand in parallel",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=config.timeout,
+        help="Seconds a plugin may spend on a single data entry (from when it starts on it) before giving up on it",
+    )
+    parser.add_argument(
+        "--bounded",
+        action="store_true",
+        help="Keep memory use flat for very large numbers of sources, by streaming plugin results and merging/deduplicating on disk",
+    )
+    parser.add_argument(
+        "--fragments",
+        nargs="?",
+        const="_data/citation-html.yaml",
+        metavar="FILE",
+        help="Also write pre-rendered HTML of citations, for site to inline (default _data/citation-html.yaml)",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=shard_groups,
+        help=f"Split citations into data files by year or type, in {config.shard_dir}, instead of one file",
+    )
+    parser.add_argument(
+        "--bulk-doi",
+        action="store_true",
+        help="Get metadata of uncached DOIs from Crossref/DataCite in bulk, instead of running Manubot on each",
+    )
+    parser.add_argument(
+        "--trust-metadata",
+        action="store_true",
+        help="Build citations from complete metadata plugins provide (e.g. DBLP) instead of running Manubot on them",
+    )
+    parser.add_argument(
+        "--canonical",
+        action="store_true",
+        help="Write citations sorted by date and id, with normalized field order, to minimize diffs",
+    )
+    parser.add_argument(
+        "--changes",
+        metavar="FILE",
+        default=config.changes_file,
+        help="Write added/removed/modified citations (with field-level deltas) to JSON file",
+    )
+    parser.add_argument(
+        "--log",
+        choices=["auto", "rich", "plain", "progress"],
+        default=config.log_mode,
+        help="Log output: colored rich output, buffered plain text, or progress bars only (auto picks rich for terminals)",
+    )
+    parser.add_argument(
+        "--verbosity",
+        "-v",
+        type=int,
+        choices=[-1, 0, 1, 2, 3],
+        default=config.verbosity,
+        help="Deepest level of log detail to show (errors/warnings always shown)",
+    )
+    parser.add_argument(
+        "--fuzzy-dedup",
+        nargs="?",
+        type=float,
+        const=config.fuzzy_threshold,
+        metavar="THRESHOLD",
+        help=f"Also remove citations with near-duplicate titles (similarity 0-1, default {config.fuzzy_threshold})",
+    )
+    parser.add_argument(
+        "--fuzzy-report",
+        metavar="FILE",
+        default=config.fuzzy_report,
+        help="Write clusters of near-duplicate titles found to JSON file, for auditing",
+    )
+    parser.add_argument(
+        "--link-members",
+        action="store_true",
+        help="Note which lab members authored each citation, in a members field",
+    )
+    parser.add_argument(
+        "--member-sources",
+        nargs="+",
+        metavar="PLUGIN",
+        default=config.member_plugins,
+        help="Also run these plugins (dblp, orcid, google-scholar) on entries derived from members' front matter links",
+    )
+    args = parser.parse_args()
+
+    # apply options
+    config.workers = args.workers
+    config.timeout = args.timeout
+    config.canonical = args.canonical
+    config.trust_metadata = args.trust_metadata
+    config.bulk_doi = args.bulk_doi
+    config.shard_by = args.shard_by or ""
+    config.bounded = args.bounded
+    if args.fragments:
+        config.fragments_file = args.fragments
+    config.changes_file = args.changes
+    config.log_mode = args.log
+    if args.fuzzy_dedup is not None:
+        config.fuzzy_dedup = True
+        config.fuzzy_threshold = args.fuzzy_dedup
+    config.fuzzy_report = args.fuzzy_report
+    config.verbosity = args.verbosity
+    config.link_members = args.link_members
+    config.member_plugins = args.member_sources
+
+    if args.watch:
+        watch(config)
+    elif not build_citations(config).ok:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
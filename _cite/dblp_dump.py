@@ -0,0 +1,354 @@
+"""
+offline dblp index. ingests downloaded dblp.xml.gz dump (from
+https://dblp.org/xml/) into local sqlite database keyed by author pid and doi,
+so dblp plugin can answer pid queries without hitting dblp.org. run as script
+to ingest or refresh:
+
+    python _cite/dblp_dump.py dblp.xml.gz [--index _cite/.cache/dblp.sqlite]
+
+then set DBLP_INDEX env var (e.g. in .env) to index file to use it.
+"""
+
+import argparse
+import gzip
+import html.entities
+import os
+import re
+import sqlite3
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from util import *
+
+
+# default location of index
+default_index = Path(__file__).parent / ".cache" / "dblp.sqlite"
+
+# record types holding publications
+publication_tags = {
+    "article",
+    "inproceedings",
+    "proceedings",
+    "book",
+    "incollection",
+    "phdthesis",
+    "mastersthesis",
+}
+
+# record children kept in index, enough for dblp plugin to build sources
+kept_tags = {"author", "title", "year", "journal", "booktitle", "ee"}
+
+# bytes of dump to parse at once
+chunk_size = 1 << 20
+
+# records to write to database at once
+batch_size = 10000
+
+schema = """
+create table if not exists meta (name text primary key, value text);
+create table if not exists records (
+    key text primary key, mdate text, xml text, generation integer
+);
+create table if not exists record_authors (name text, key text);
+create index if not exists record_authors_name on record_authors (name);
+create index if not exists record_authors_key on record_authors (key);
+create table if not exists names (name text primary key, pid text, generation integer);
+create index if not exists names_pid on names (pid);
+create table if not exists dois (doi text primary key, key text);
+create index if not exists dois_key on dois (key);
+"""
+
+
+def resolve_entities(chunks):
+    """
+    replace html named entities (defined in dblp.dtd, which xml parser doesn't
+    load) with characters, across chunk boundaries
+    """
+
+    builtin = {"amp", "lt", "gt", "quot", "apos"}
+
+    def replace(match):
+        name = match.group(1)
+        if name in builtin or name not in html.entities.name2codepoint:
+            return match.group(0)
+        return chr(html.entities.name2codepoint[name])
+
+    rest = ""
+    for chunk in chunks:
+        text = rest + chunk
+        # hold back possibly incomplete entity at end of chunk
+        cut = text.rfind("&")
+        if cut != -1 and ";" not in text[cut:]:
+            text, rest = text[:cut], text[cut:]
+        else:
+            rest = ""
+        yield re.sub(r"&([a-zA-Z][a-zA-Z0-9]*);", replace, text)
+    if rest:
+        yield rest
+
+
+def read_dump(path):
+    """
+    stream top-level records of dump as they're parsed, freeing each after
+    """
+
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf8") as file:
+        chunks = iter(lambda: file.read(chunk_size), "")
+
+        parser = ET.XMLPullParser(events=("start", "end"))
+        depth = 0
+        root = None
+        for chunk in resolve_entities(chunks):
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        root = element
+                    continue
+                depth -= 1
+                if depth == 1:
+                    yield element
+                    root.clear()
+        parser.close()
+
+
+def compact(element):
+    """
+    serialize record with only fields plugin uses
+    """
+
+    record = ET.Element(element.tag, {"key": element.get("key", "")})
+    for child in element:
+        if child.tag in kept_tags:
+            kept = ET.SubElement(record, child.tag)
+            kept.text = "".join(child.itertext())
+    return ET.tostring(record, encoding="unicode")
+
+
+def get_doi(element):
+    """
+    doi of record, from its electronic edition links
+    """
+
+    for ee in element.findall("ee"):
+        match = re.search(r"doi\.org/(.+)$", ee.text or "")
+        if match:
+            return match.group(1)
+    return ""
+
+
+def connect(index=default_index):
+    """
+    open index database, creating tables if needed
+    """
+
+    Path(index).parent.mkdir(parents=True, exist_ok=True)
+    database = sqlite3.connect(str(index))
+    database.executescript(schema)
+    return database
+
+
+def get_meta(database, name, default=""):
+    """
+    get value stored about index, e.g. dump last ingested
+    """
+
+    row = database.execute("select value from meta where name = ?", (name,)).fetchone()
+    return row[0] if row else default
+
+
+def ingest(dump, index=default_index, force=False):
+    """
+    ingest dump into index. if index already has an older dump, only records
+    added or modified since (by mdate) are rewritten, and records no longer
+    in dump are removed. returns counts of records seen, written, and removed.
+    """
+
+    dump = Path(dump)
+    stat = dump.stat()
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    database = connect(index)
+
+    # same dump as last time, nothing to do
+    if not force and get_meta(database, "dump") == stamp:
+        log("Index already up to date with dump", level="INFO")
+        database.close()
+        return {"seen": 0, "written": 0, "removed": 0}
+
+    generation = int(get_meta(database, "generation", "0")) + 1
+    counts = {"seen": 0, "written": 0, "removed": 0}
+
+    def write(batch):
+        cursor = database.cursor()
+        for kind, values in batch:
+            if kind == "name":
+                cursor.execute(
+                    "insert or replace into names values (?, ?, ?)", (*values, generation)
+                )
+                continue
+
+            key, mdate, element = values
+
+            # unchanged since previous dump, just mark as still present
+            cursor.execute(
+                "update records set generation = ? where key = ? and mdate = ?",
+                (generation, key, mdate),
+            )
+            if cursor.rowcount:
+                continue
+
+            cursor.execute(
+                "insert or replace into records values (?, ?, ?, ?)",
+                (key, mdate, compact(element), generation),
+            )
+            cursor.execute("delete from record_authors where key = ?", (key,))
+            cursor.executemany(
+                "insert into record_authors values (?, ?)",
+                [(author.text, key) for author in element.findall("author") if author.text],
+            )
+            cursor.execute("delete from dois where key = ?", (key,))
+            doi = get_doi(element)
+            if doi:
+                cursor.execute("insert or replace into dois values (?, ?)", (doi.lower(), key))
+            counts["written"] += 1
+        database.commit()
+
+    log(f"Ingesting {dump.name} into {Path(index).name}")
+
+    batch = []
+    for element in read_dump(dump):
+        key = element.get("key", "")
+
+        # person pages map pid to every name variant of person
+        if element.tag == "www" and key.startswith("homepages/"):
+            pid = key[len("homepages/") :]
+            for author in element.findall("author"):
+                if author.text:
+                    batch.append(("name", (author.text, pid)))
+
+        elif element.tag in publication_tags and key:
+            batch.append(("record", (key, element.get("mdate", ""), element)))
+            counts["seen"] += 1
+
+        if len(batch) >= batch_size:
+            write(batch)
+            batch = []
+            if counts["seen"] % (batch_size * 10) < batch_size:
+                log(f"{counts['seen']:,} record(s), {counts['written']:,} written", indent=1)
+
+    write(batch)
+
+    # remove records and names no longer in dump
+    stale = "select key from records where generation < ?"
+    database.execute(f"delete from record_authors where key in ({stale})", (generation,))
+    database.execute(f"delete from dois where key in ({stale})", (generation,))
+    counts["removed"] = database.execute(
+        "delete from records where generation < ?", (generation,)
+    ).rowcount
+    database.execute("delete from names where generation < ?", (generation,))
+
+    database.execute("insert or replace into meta values ('dump', ?)", (stamp,))
+    database.execute("insert or replace into meta values ('generation', ?)", (str(generation),))
+    database.commit()
+    database.close()
+
+    log(
+        f"{counts['seen']:,} record(s), {counts['written']:,} written, "
+        f"{counts['removed']:,} removed",
+        level="SUCCESS",
+    )
+
+    return counts
+
+
+def record_year(xml):
+    """
+    year of indexed record, for sorting. blank if none.
+    """
+
+    match = re.search(r"<year>(\d+)</year>", xml)
+    return match.group(1) if match else ""
+
+
+def query_pid(pid, index=default_index):
+    """
+    get publications of author by pid from index, as dblp person xml (same
+    shape as https://dblp.org/pid/{pid}.xml). none if pid not in index.
+    """
+
+    if not Path(index).is_file():
+        return None
+
+    database = sqlite3.connect(f"file:{index}?mode=ro", uri=True)
+    try:
+        names = [row[0] for row in database.execute("select name from names where pid = ?", (pid,))]
+        if not names:
+            return None
+        rows = database.execute(
+            f"""
+            select distinct records.xml, records.mdate from records
+            join record_authors on record_authors.key = records.key
+            where record_authors.name in ({", ".join("?" * len(names))})
+            order by records.key
+            """,
+            names,
+        ).fetchall()
+    finally:
+        database.close()
+
+    # newest first, as dblp.org lists them
+    rows.sort(key=lambda row: (record_year(row[0]), row[1]), reverse=True)
+
+    body = "".join(f"<r>{xml}</r>" for xml, _ in rows)
+    return f'<dblpperson pid="{pid}">{body}</dblpperson>'.encode("utf8")
+
+
+def query_doi(doi, index=default_index):
+    """
+    get record for doi from index, as xml. none if doi not in index.
+    """
+
+    if not Path(index).is_file():
+        return None
+
+    database = sqlite3.connect(f"file:{index}?mode=ro", uri=True)
+    try:
+        row = database.execute(
+            "select records.xml from dois join records on records.key = dois.key where dois.doi = ?",
+            (doi.lower(),),
+        ).fetchone()
+    finally:
+        database.close()
+
+    return row[0].encode("utf8") if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest DBLP XML dump into local index, for offline DBLP plugin queries"
+    )
+    parser.add_argument("dump", help="Path to dblp.xml.gz (or dblp.xml) from https://dblp.org/xml/")
+    parser.add_argument(
+        "--index",
+        default=os.environ.get("DBLP_INDEX") or str(default_index),
+        help="Index database file to create or refresh",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest even if dump unchanged since last ingest",
+    )
+    args = parser.parse_args()
+
+    try:
+        ingest(args.dump, args.index, args.force)
+    except Exception as e:
+        log(e, level="ERROR")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
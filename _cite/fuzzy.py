@@ -0,0 +1,253 @@
+"""
+fuzzy duplicate detection for citations by title similarity. titles are
+normalized once, signed with minhash in batch with numpy, and candidate pairs
+found with locality-sensitive hashing (lsh) are checked and clustered.
+"""
+
+import json
+import re
+import unicodedata
+import zlib
+from pathlib import Path
+import numpy as np
+from util import *
+
+
+# mersenne prime for minhash permutations. values stay below 2^31, so
+# products of two stay below 2^62 and fit in uint64.
+prime = (1 << 31) - 1
+
+# titles to sign at once, to bound memory of (permutations x shingles) array
+chunk_size = 1000
+
+
+def stem(word):
+    """
+    strip trivial plural endings, so e.g. "networks" matches "network"
+    """
+
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_text(title):
+    """
+    fold unicode (accents, ligatures, case) and punctuation out of title
+    """
+
+    title = unicodedata.normalize("NFKD", str(title or ""))
+    title = "".join(char for char in title if not unicodedata.combining(char)).casefold()
+    return " ".join(stem(word) for word in re.findall(r"\w+", title))
+
+
+def shingles(text, size=5):
+    """
+    set of overlapping character n-grams of text
+    """
+
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[index : index + size] for index in range(len(text) - size + 1)}
+
+
+def signatures(shingle_sets, permutations=64, seed=0):
+    """
+    minhash signature of each shingle set, as (sets x permutations) array.
+    empty sets get all-max signatures, which never match in lsh (see below).
+    """
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, prime, size=permutations, dtype=np.uint64)
+    b = rng.integers(0, prime, size=permutations, dtype=np.uint64)
+
+    result = np.full((len(shingle_sets), permutations), prime, dtype=np.uint64)
+
+    for start in range(0, len(shingle_sets), chunk_size):
+        # flatten chunk's shingle hashes, noting where each set starts
+        hashes, offsets, rows = [], [], []
+        for row in range(start, min(start + chunk_size, len(shingle_sets))):
+            if not shingle_sets[row]:
+                continue
+            offsets.append(len(hashes))
+            rows.append(row)
+            hashes.extend(zlib.crc32(shingle.encode("utf8")) for shingle in shingle_sets[row])
+        if not rows:
+            continue
+
+        # apply all permutations to all hashes at once, then min within each set
+        values = np.array(hashes, dtype=np.uint64) % prime
+        values = (a[:, None] * values[None, :] + b[:, None]) % prime
+        result[rows] = np.minimum.reduceat(values, offsets, axis=1).T
+
+    return result
+
+
+def pick_bands(permutations, threshold):
+    """
+    pick number of lsh bands (and rows per band) whose similarity threshold,
+    roughly (1 / bands) ^ (1 / rows), is closest to requested threshold
+    """
+
+    options = [
+        (bands, permutations // bands)
+        for bands in range(1, permutations + 1)
+        if permutations % bands == 0
+    ]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+def candidate_pairs(signatures, threshold):
+    """
+    pairs of rows whose signatures match in at least one lsh band
+    """
+
+    bands, rows = pick_bands(signatures.shape[1], threshold)
+
+    # rows with empty titles never match
+    valid = ~(signatures == prime).all(axis=1)
+
+    # collapse each band to one hash per row
+    weights = np.random.default_rng(1).integers(1, prime, size=rows, dtype=np.uint64)
+
+    pairs = set()
+    for band in range(bands):
+        keys = (signatures[:, band * rows : (band + 1) * rows] * weights).sum(axis=1)
+        keys = keys[valid]
+        indices = np.flatnonzero(valid)
+        order = np.argsort(keys, kind="stable")
+        keys, indices = keys[order], indices[order]
+
+        # runs of equal keys are buckets
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        for bucket in np.split(indices, boundaries):
+            if len(bucket) < 2:
+                continue
+            bucket = sorted(bucket.tolist())
+            for i, first in enumerate(bucket):
+                for second in bucket[i + 1 :]:
+                    pairs.add((first, second))
+
+    return pairs
+
+
+def jaccard(first, second):
+    """
+    exact jaccard similarity of two sets
+    """
+
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def preference(citation, index):
+    """
+    sort key for which citation in a cluster to keep. prefer user-entered
+    sources, then published over preprint, then citeable (has id), then more
+    complete, then earliest.
+    """
+
+    return (
+        get_safe(citation, "plugin", "") != "sources.py",
+        is_arxiv_paper(citation),
+        not get_id(citation, ""),
+        -len(citation.keys()),
+        index,
+    )
+
+
+def find_clusters(citations, threshold=0.8, permutations=64):
+    """
+    group citations with similar titles. returns list of clusters, each a list
+    of (index, similarity to first member), first member being one to keep.
+    """
+
+    # normalize titles once
+    sets = [shingles(normalize_text(get_title(citation, ""))) for citation in citations]
+
+    # union-find over verified similar pairs
+    parent = list(range(len(citations)))
+
+    def root(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for first, second in candidate_pairs(signatures(sets, permutations), threshold):
+        if jaccard(sets[first], sets[second]) >= threshold:
+            parent[root(second)] = root(first)
+
+    groups = {}
+    for index in range(len(citations)):
+        groups.setdefault(root(index), []).append(index)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda index: preference(citations[index], index))
+
+        # only count members directly similar to one kept, not chained via others
+        kept = sets[members[0]]
+        cluster = [(index, round(jaccard(kept, sets[index]), 3)) for index in members]
+        cluster = cluster[:1] + [member for member in cluster[1:] if member[1] >= threshold]
+        if len(cluster) > 1:
+            clusters.append(cluster)
+
+    return clusters
+
+
+def remove_fuzzy_duplicates(citations, threshold=0.8, permutations=64, report=""):
+    """
+    remove citations whose titles are near-duplicates of another citation,
+    keeping the preferred one of each cluster. optionally write audit report
+    of clusters to json file.
+    """
+
+    clusters = find_clusters(citations, threshold, permutations)
+
+    log(f"Found {len(clusters)} cluster(s) of similar titles")
+
+    remove = set()
+    audit = []
+    for cluster in clusters:
+        (kept, _), *others = cluster
+        log(f"Keeping '{str(get_title(citations[kept], ''))[:50]}...'", indent=1)
+        for index, similarity in others:
+            remove.add(index)
+            log(
+                f"Removing '{str(get_title(citations[index], ''))[:50]}...' (similarity: {similarity})",
+                indent=2,
+            )
+
+        def summary(index, similarity=None):
+            entry = {
+                "id": get_id(citations[index], ""),
+                "title": get_title(citations[index], ""),
+                "plugin": get_safe(citations[index], "plugin", ""),
+            }
+            if similarity is not None:
+                entry["similarity"] = similarity
+            return entry
+
+        audit.append(
+            {
+                "kept": summary(kept),
+                "removed": [summary(index, similarity) for index, similarity in others],
+            }
+        )
+
+    if report:
+        try:
+            Path(report).write_text(json.dumps(audit, indent=2, default=str) + "\n")
+        except Exception:
+            raise Exception("Can't write fuzzy duplicate report")
+
+    if remove:
+        log(f"Removed {len(remove)} fuzzy duplicate(s)", level="INFO")
+
+    return [citation for index, citation in enumerate(citations) if index not in remove]
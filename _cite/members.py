@@ -0,0 +1,325 @@
+"""
+index of lab members from _members front matter, to look members up by role,
+alumni status, alias, or orcid, to match author names in citations (by name or
+alias) to members, and to derive plugin entries
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+import yaml
+from yaml.loader import SafeLoader
+from util import *
+
+
+# parsed front matter of files read so far, by path, with modified time/size
+# and content hash of file when read
+front_matter_cache = {}
+
+
+def load_front_matter(path):
+    """
+    read yaml front matter at top of markdown file. files are only parsed
+    again if their modified time/size and contents changed since last read.
+    """
+
+    path = Path(path)
+
+    try:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = front_matter_cache.get(path)
+        if cached and cached[0] == stamp:
+            return dict(cached[2])
+        text = path.read_text(encoding="utf8")
+    except Exception:
+        raise Exception(f"Can't read {path}")
+
+    # file touched but not edited
+    digest = content_hash(text)
+    if cached and cached[1] == digest:
+        front_matter_cache[path] = (stamp, digest, cached[2])
+        return dict(cached[2])
+
+    data = parse_front_matter(text, path)
+    front_matter_cache[path] = (stamp, digest, data)
+    return dict(data)
+
+
+def parse_front_matter(text, path=""):
+    """
+    parse yaml front matter at top of markdown text
+    """
+
+    match = re.match(r"\A---\s*\n(.*?)\n---\s*(\n|\Z)", text, re.DOTALL)
+    if not match:
+        return {}
+
+    try:
+        data = yaml.load(match.group(1), Loader=SafeLoader)
+    except Exception:
+        raise Exception(f"Can't parse front matter of {path}. Make sure it's valid YAML.")
+
+    return data if isinstance(data, dict) else {}
+
+
+def load_members(root=".", folder="_members"):
+    """
+    get front matter of all member files (including alumni), with slug (file
+    name, as jekyll uses to look up members) and alumni status added
+    """
+
+    members = []
+    for path in sorted(Path(root, folder).glob("**/*.md")):
+        member = load_front_matter(path)
+        member["slug"] = path.stem
+        member["alumni"] = bool(
+            member.get("alumni")
+            or member.get("role") == "alumni"
+            or "alumni" in path.relative_to(Path(root, folder)).parts[:-1]
+        )
+        members.append(member)
+
+    return members
+
+
+def get_orcid(member):
+    """
+    orcid id of member from their links, if any, without url prefix
+    """
+
+    orcid = str(get_safe(member, "links.orcid", "") or "").strip().rstrip("/")
+    return orcid.rsplit("/", 1)[-1]
+
+
+def get_dblp(member):
+    """
+    dblp pid of member from their links, if any (e.g. "154/4313", from pid or
+    profile url)
+    """
+
+    pid = str(get_safe(member, "links.dblp", "") or "").strip()
+    match = re.search(r"pid/(.+?)(\.html|\.xml)?/?$", pid)
+    return match.group(1) if match else pid
+
+
+def get_scholar(member):
+    """
+    google scholar id of member from their links, if any (from id or profile url)
+    """
+
+    gsid = str(get_safe(member, "links.google-scholar", "") or "").strip()
+    match = re.search(r"[?&]user=([^&#]+)", gsid)
+    return match.group(1) if match else gsid
+
+
+# how to derive data entry for each plugin from member, if member has needed link
+member_entries = {
+    "dblp": lambda member: get_dblp(member) and {"author_id": get_dblp(member)},
+    "orcid": lambda member: get_orcid(member) and {"orcid": get_orcid(member)},
+    "google-scholar": lambda member: get_scholar(member) and {"gsid": get_scholar(member)},
+}
+
+
+def name_parts(name):
+    """
+    split author name into folded words, in given-family order. handles
+    "family, given" order and punctuation in initials (e.g. "C. X. Lu"). dblp
+    homonym numbers (e.g. "Chris Lu 0002") are kept as last part, as they mark
+    a different person with the same name.
+    """
+
+    name = unicodedata.normalize("NFKD", str(name or ""))
+    name = "".join(char for char in name if not unicodedata.combining(char))
+
+    # dblp disambiguates people with same name with 4 digit number at end
+    homonym = re.search(r"\s+(\d{4})$", name.strip())
+    name = name.strip()[: homonym.start()] if homonym else name.strip()
+
+    # "family, given" to "given family"
+    if name.count(",") == 1:
+        family, given = name.split(",")
+        name = f"{given} {family}"
+
+    parts = re.findall(r"[^\W\d_]+", name)
+    if homonym:
+        parts.append(homonym.group(1))
+    return parts
+
+
+def name_key(parts):
+    """
+    key to match full names on
+    """
+
+    return " ".join(parts).casefold()
+
+
+@dataclass
+class AuthorIndex:
+    """
+    lookup of every member name/alias to member slug, and member slug to
+    canonical (display) name. names only match exactly (ignoring case,
+    accents, punctuation, and name order), so abbreviated or dblp-numbered
+    forms of a member's name must be listed in their aliases.
+    """
+
+    # full name keys to slug
+    names: dict = field(default_factory=dict)
+
+    # slug to canonical name
+    canonical: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_members(cls, members):
+        """
+        build index from member front matter. variants shared by more than one
+        member are left out, so they never match the wrong person.
+        """
+
+        index = cls()
+        ambiguous = set()
+
+        def add(table, key, slug):
+            if not key:
+                return
+            if table.get(key, slug) != slug:
+                ambiguous.add(key)
+            table[key] = slug
+
+        for member in members:
+            slug = member.get("slug")
+            name = member.get("name") or member.get("title")
+            if not slug or not name:
+                continue
+            index.canonical[slug] = str(name)
+
+            aliases = member.get("aliases") or []
+            if isinstance(aliases, str):
+                aliases = [aliases]
+
+            for variant in [name, *aliases]:
+                parts = name_parts(variant)
+                add(index.names, name_key(parts), slug)
+
+        for key in ambiguous:
+            index.names.pop(key, None)
+
+        return index
+
+    def match(self, name):
+        """
+        get slug of member author name refers to, if any
+        """
+
+        return self.names.get(name_key(name_parts(name)))
+
+    def find(self, authors):
+        """
+        get slugs of members among author names, in order
+        """
+
+        slugs = []
+        for author in authors:
+            slug = self.match(author)
+            if slug is not None and slug not in slugs:
+                slugs.append(slug)
+
+        return slugs
+
+
+@dataclass
+class MemberIndex:
+    """
+    all lab members, with lookups by slug, role, alias, and orcid
+    """
+
+    # member front matter, in file order
+    members: list = field(default_factory=list)
+
+    # lookups to members
+    slugs: dict = field(default_factory=dict)
+    roles: dict = field(default_factory=dict)
+    orcids: dict = field(default_factory=dict)
+
+    # author name variants to member slugs
+    authors: AuthorIndex = field(default_factory=AuthorIndex)
+
+    @classmethod
+    def load(cls, root=".", folder="_members"):
+        """
+        build index from member files. unchanged files aren't parsed again.
+        """
+
+        members = load_members(root, folder)
+        index = cls(members=members, authors=AuthorIndex.from_members(members))
+
+        for member in members:
+            index.slugs[member["slug"]] = member
+            index.roles.setdefault(member.get("role", ""), []).append(member)
+            orcid = get_orcid(member)
+            if orcid:
+                index.orcids[orcid] = member
+
+        return index
+
+    def get(self, slug):
+        """
+        get member by slug (file name)
+        """
+
+        return self.slugs.get(slug)
+
+    def by_role(self, role):
+        """
+        get members with role
+        """
+
+        return self.roles.get(role, [])
+
+    def current(self):
+        """
+        get members that aren't alumni
+        """
+
+        return [member for member in self.members if not member["alumni"]]
+
+    def alumni(self):
+        """
+        get alumni
+        """
+
+        return [member for member in self.members if member["alumni"]]
+
+    def by_alias(self, name):
+        """
+        get member an author name (their name or an alias) refers to
+        """
+
+        return self.slugs.get(self.authors.match(name))
+
+    def by_orcid(self, orcid):
+        """
+        get member with orcid (id or url)
+        """
+
+        return self.orcids.get(get_orcid({"links": {"orcid": orcid}}))
+
+    def plugin_entries(self, plugin):
+        """
+        data entries for plugin derived from all members' front matter, e.g.
+        orcid entry for each member with orcid link. see member_entries.
+        """
+
+        derive = member_entries.get(plugin)
+        if not derive:
+            return []
+
+        entries = []
+        for member in self.members:
+            entry = derive(member)
+            if entry and entry not in entries:
+                entries.append(entry)
+
+        return entries
@@ -1,12 +1,15 @@
 """
 DBLP plugin for fetching publications from DBLP XML API
 Processes entries from _data/dblp*.yaml files
+Answers from local index of DBLP dump instead, if DBLP_INDEX env var is set (see dblp_dump.py)
 """
 
+import os
 import re
 import xml.etree.ElementTree as ET
 from urllib.request import Request, urlopen
 from util import *
+from dblp_dump import query_pid
 
 
 def main(entry):
@@ -28,11 +31,14 @@ def main(entry):
         """Query DBLP by author PID using XML API"""
         url = f"https://dblp.org/pid/{pid}.xml"
         request = Request(url=url)
-        response = urlopen(request).read()
+        response = urlopen(request, timeout=request_timeout).read()
         return response
 
-    # fetch publications XML
-    xml_data = query_by_pid(author_id)
+    # fetch publications XML, from local dump index if available
+    index = os.environ.get("DBLP_INDEX", "")
+    xml_data = query_pid(author_id, index) if index else None
+    if xml_data is None:
+        xml_data = query_by_pid(author_id)
 
     # parse XML
     root = ET.fromstring(xml_data)
@@ -72,7 +78,10 @@ def main(entry):
 
             # get venue/publisher
             venue = ""
-            venue_elem = pub.find('journal') or pub.find('booktitle')
+            # (elements without children are falsy, so check for None explicitly)
+            venue_elem = pub.find('journal')
+            if venue_elem is None:
+                venue_elem = pub.find('booktitle')
             if venue_elem is not None:
                 venue = venue_elem.text or ""
 
@@ -92,6 +101,17 @@ def main(entry):
             if doi:
                 # prefer DOI for manubot citation
                 source["id"] = f"doi:{doi}"
+
+                # keep metadata, for cite process to use instead of manubot if trusted
+                metadata = {
+                    "title": title,
+                    # drop dblp's homonym numbers, e.g. "Chris Lu 0001"
+                    "authors": [re.sub(r"\s+\d{4}$", "", author) for author in authors],
+                    "publisher": venue,
+                    "date": f"{year}-01-01" if year else "",
+                    "link": f"https://doi.org/{doi}",
+                }
+                source["metadata"] = {key: value for key, value in metadata.items() if value}
             else:
                 # manual entry if no DOI
                 if title:
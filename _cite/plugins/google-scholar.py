@@ -3,6 +3,13 @@ from serpapi import GoogleSearch
 from util import *
 
 
+# compiled getters for fields read for every article
+get_year = getter("year")
+get_citation_id = getter("citation_id")
+get_authors = getter("authors")
+get_publication = getter("publication")
+
+
 def main(entry):
     """
     receives single list entry from google-scholar data file
@@ -41,15 +48,15 @@ def main(entry):
     # go through response and format sources
     for work in response:
         # create source
-        year = get_safe(work, "year", "")
+        year = get_year(work, "")
         source = {
-            "id": get_safe(work, "citation_id", ""),
+            "id": get_citation_id(work, ""),
             # api does not provide Manubot-citeable id, so keep citation details
-            "title": get_safe(work, "title", ""),
-            "authors": list(map(str.strip, get_safe(work, "authors", "").split(","))),
-            "publisher": get_safe(work, "publication", ""),
+            "title": get_title(work, ""),
+            "authors": list(map(str.strip, get_authors(work, "").split(","))),
+            "publisher": get_publication(work, ""),
             "date": (year + "-01-01") if year else "",
-            "link": get_safe(work, "link", ""),
+            "link": get_link(work, ""),
         }
 
         # copy fields from entry to source
@@ -4,6 +4,14 @@ from util import *
 from manubot.cite.handlers import prefix_to_handler as manubot_citable
 
 
+# compiled getters for fields read for every work
+get_summaries = getter("work-summary")
+get_external_ids = getter("external-ids.external-id")
+get_relationship = getter("external-id-relationship")
+get_type = getter("external-id-type")
+get_value = getter("external-id-value")
+
+
 def main(entry):
     """
     receives single list entry from orcid data file
@@ -25,7 +33,7 @@ def main(entry):
     def query(_id):
         url = endpoint.replace("$ORCID", _id)
         request = Request(url=url, headers=headers)
-        response = json.loads(urlopen(request).read())
+        response = json.loads(urlopen(request, timeout=request_timeout).read())
         return get_safe(response, "group", [])
 
     response = query(_id)
@@ -37,10 +45,10 @@ def main(entry):
     def filter_id(_id):
         # is id of certain "relationship" type
         relationships = ["self", "version-of", "part-of"]
-        if not get_safe(_id, "external-id-relationship", "") in relationships:
+        if not get_relationship(_id, "") in relationships:
             return False
 
-        id_type = get_safe(_id, "external-id-type", "")
+        id_type = get_type(_id, "")
 
         # is id of certain type
         # types = ["doi"]
@@ -55,7 +63,7 @@ def main(entry):
 
     # prefer some ids over others by some criteria. return lower number to prefer more.
     def sort_id(_id):
-        id_type = get_safe(_id, "external-id-type", "")
+        id_type = get_type(_id, "")
         types = [
             "doi",
             # "arxiv",
@@ -69,8 +77,8 @@ def main(entry):
         ids = []
 
         # use "work-summary" field instead of top-level "external-ids" to reflect author-selected preferred sources
-        for summary in get_safe(work, "work-summary", []):
-            ids = ids + get_safe(summary, "external-ids.external-id", [])
+        for summary in get_summaries(work, []):
+            ids = ids + get_external_ids(summary, [])
 
         # filter ids by criteria
         ids = list(filter(filter_id, ids))
@@ -81,8 +89,8 @@ def main(entry):
         _id = ids[0] if len(ids) > 0 else None
 
         # id parts
-        id_type = get_safe(_id, "external-id-type", "")
-        id_value = get_safe(_id, "external-id-value", "")
+        id_type = get_type(_id, "")
+        id_value = get_value(_id, "")
 
         # create source
         source = {}
@@ -95,7 +103,7 @@ def main(entry):
         # if not citable by manubot, keep citation details from orcid
         else:
             # get summaries
-            summaries = get_safe(work, "work-summary", [])
+            summaries = get_summaries(work, [])
 
             # get first summary with defined sub-value
             def first(get_func):
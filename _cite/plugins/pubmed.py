@@ -24,7 +24,7 @@ def main(entry):
     def query(_id):
         url = endpoint.replace("$TERM", quote(_id))
         request = Request(url=url)
-        response = json.loads(urlopen(request).read())
+        response = json.loads(urlopen(request, timeout=request_timeout).read())
         return get_safe(response, "esearchresult.idlist", [])
 
     response = query(_id)
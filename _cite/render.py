@@ -0,0 +1,198 @@
+"""
+pre-rendered html of citation text (title, authors, venue, date, id), same
+markup _includes/citation.html renders with liquid, so site build can inline
+it. fragments are cached by hash of fields they're rendered from, so only
+changed citations are rendered again.
+"""
+
+import html
+import json
+import re
+from datetime import datetime
+from util import *
+
+
+# version of fragment markup, bumped when it changes, to re-render all
+render_version = 1
+
+# citation fields fragments are rendered from
+render_fields = ["id", "title", "authors", "publisher", "date", "link", "members"]
+
+# authors shown at start and end of long author lists, as array_carve filter does
+carve_length = 5
+
+# text liquid would render differently than plain escaping (raw html, or
+# markdown and smart punctuation in authors, which template markdownifies)
+raw_html = re.compile(r"<")
+markdown = re.compile(r"[*_`\[\]\\'\"<>]|--|^\s*[#>+-]|^\s*\d+\.")
+
+
+def carve(items, length=carve_length):
+    """
+    first and last items of long list, with ellipsis between, as array_carve
+    """
+
+    if len(items) <= length * 2:
+        return items
+    return items[:length] + ["..."] + items[-length:]
+
+
+def format_day(value):
+    """
+    format date as "%d %b %Y", as liquid date filter, or leave as is
+    """
+
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").strftime("%d %b %Y")
+    except ValueError:
+        return str(value)
+
+
+def renderable(citation):
+    """
+    whether fragment of citation would match liquid rendering exactly. others
+    are left for template to render.
+    """
+
+    for key in ["id", "title", "publisher"]:
+        if raw_html.search(str(get_safe(citation, key, "") or "")):
+            return False
+    for author in get_safe(citation, "authors", []) or []:
+        if markdown.search(str(author)):
+            return False
+    link = str(get_safe(citation, "link", "") or "")
+    # relative links need site baseurl
+    if link and "://" not in link:
+        return False
+    return True
+
+
+def render_authors(authors, highlight):
+    """
+    render author list, with lab members highlighted
+    """
+
+    if not authors:
+        return "[no author info]"
+
+    # template splits on commas within names too
+    names = [name.strip() for name in ",".join(map(str, authors)).split(",")]
+
+    parts = []
+    for name in carve(names):
+        if name == "...":
+            parts.append("&hellip;")
+        elif name in highlight:
+            parts.append(f'<span class="citation-member">{html.escape(name, quote=False)}</span>')
+        else:
+            parts.append(html.escape(name, quote=False))
+    return ", ".join(parts)
+
+
+def member_names(citation, index=None):
+    """
+    author names (split on commas, as template splits them) that refer to
+    members citation is noted with, per member author index
+    """
+
+    members = get_safe(citation, "members", []) or []
+    if not index or not members:
+        return set()
+
+    names = set()
+    for author in get_safe(citation, "authors", []) or []:
+        if index.match(author) in members:
+            names.update(name.strip() for name in str(author).split(","))
+    return names
+
+
+def render_citation(citation, index=None):
+    """
+    render html of citation's text, or none if template should render it.
+    index is member author index, to highlight members among authors.
+    """
+
+    if not renderable(citation):
+        return None
+
+    escape = lambda value: html.escape(str(value), quote=False)
+    attribute = lambda value: html.escape(str(value), quote=True)
+
+    authors = get_safe(citation, "authors", []) or []
+    highlight = member_names(citation, index)
+
+    link = get_safe(citation, "link", "")
+    href = f' href="{attribute(link)}"' if link else ""
+    tooltip = (
+        f' data-tooltip="{attribute(", ".join(map(str, authors)))}"' if len(authors) > 10 else ""
+    )
+
+    date = get_safe(citation, "date", "")
+
+    return (
+        f'<a{href} class="citation-title">'
+        f'{escape(get_safe(citation, "title", "") or "[no title info]")}</a>'
+        f'<div class="citation-authors"{tooltip} tabindex="0">'
+        f"{render_authors(authors, highlight)}</div>"
+        f'<div class="citation-details">'
+        f'<span class="citation-publisher">'
+        f'{escape(get_safe(citation, "publisher", "") or "[no publisher info]")}</span>'
+        "&nbsp;&middot;&nbsp;"
+        f'<span class="citation-date">{escape(format_day(date) if date else "[no date info]")}</span>'
+        "&nbsp;&middot;&nbsp;"
+        f'<span class="citation-id">{escape(get_safe(citation, "id", "") or "[no id info]")}</span>'
+        f"</div>"
+    )
+
+
+def fragment_hash(citation, index=None):
+    """
+    hash of everything fragment of citation is rendered from
+    """
+
+    fields = {key: get_safe(citation, key, None) for key in render_fields}
+    highlight = sorted(member_names(citation, index))
+    text = json.dumps([render_version, fields, highlight], sort_keys=True, default=str)
+    return content_hash(text)[:16]
+
+
+def load_fragments(path):
+    """
+    load previous fragments, if any
+    """
+
+    try:
+        fragments = load_data(path)
+    except Exception:
+        return {}
+    return fragments if isinstance(fragments, dict) else {}
+
+
+def build_fragments(citations, previous=None, index=None):
+    """
+    render fragment of each citation, by citation key (id, or title if no
+    id). fragments of citations unchanged since previous are reused. returns
+    fragments and number of citations rendered.
+    """
+
+    previous = previous or {}
+
+    fragments = {}
+    rendered = 0
+    for citation in citations:
+        key = str(get_id(citation, "") or get_title(citation, ""))
+        if not key:
+            continue
+        _hash = fragment_hash(citation, index)
+
+        old = previous.get(key)
+        if isinstance(old, dict) and old.get("hash") == _hash:
+            fragments[key] = old
+            continue
+
+        fragment = render_citation(citation, index)
+        rendered += 1
+        if fragment is not None:
+            fragments[key] = {"hash": _hash, "html": fragment}
+
+    return fragments, rendered
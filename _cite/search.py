@@ -0,0 +1,139 @@
+"""
+prebuilt inverted index of citations for site search. tokens are kept sorted,
+so site can find all tokens starting with a search term by binary search.
+"""
+
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from util import *
+
+
+# version of index format, bumped when tokens or layout change
+index_version = 1
+
+# citation fields to index
+search_fields = ["id", "title", "authors", "publisher", "date", "description", "tags"]
+
+
+def tokenize(text):
+    """
+    split text into folded (no accents, lowercase) word tokens. must match
+    tokenizing in _scripts/search.js.
+    """
+
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return re.findall(r"[^\W_]+", text)
+
+
+def citation_text(citation):
+    """
+    searchable text of citation
+    """
+
+    parts = []
+    for key in search_fields:
+        value = get_safe(citation, key, "")
+        if isinstance(value, (list, tuple)):
+            parts += map(str, value)
+        elif value:
+            parts.append(str(value))
+    return "\n".join(parts)
+
+
+def citation_tokens(citation):
+    """
+    unique tokens of citation, in sorted order
+    """
+
+    return sorted(set(tokenize(citation_text(citation))))
+
+
+def load_search_index(path):
+    """
+    load previous index, if any and of current format
+    """
+
+    try:
+        index = json.loads(Path(path).read_text(encoding="utf8"))
+    except Exception:
+        return {}
+    if not isinstance(index, dict) or index.get("version") != index_version:
+        return {}
+    return index
+
+
+def invert_search_index(index):
+    """
+    get tokens of each citation in index, by citation key and text hash
+    """
+
+    keys = index.get("keys", [])
+    hashes = index.get("hashes", [])
+    tokens = [[] for _ in keys]
+    for token, positions in zip(index.get("tokens", []), index.get("postings", [])):
+        for position in positions:
+            tokens[position].append(token)
+    return {(key, _hash): doc for key, _hash, doc in zip(keys, hashes, tokens)}
+
+
+def build_search_index(citations, previous=None):
+    """
+    build index of citations, in output order. tokens of citations unchanged
+    since previous index are reused, only changed citations are tokenized.
+    returns index and number of citations tokenized.
+    """
+
+    reuse = invert_search_index(previous or {})
+
+    keys, hashes, postings = [], [], {}
+    tokenized = 0
+    for position, citation in enumerate(citations):
+        key = str(get_id(citation, "") or get_title(citation, ""))
+        _hash = content_hash(citation_text(citation))[:16]
+
+        tokens = reuse.get((key, _hash))
+        if tokens is None:
+            tokens = citation_tokens(citation)
+            tokenized += 1
+
+        keys.append(key)
+        hashes.append(_hash)
+        for token in tokens:
+            postings.setdefault(token, []).append(position)
+
+    tokens = sorted(postings)
+
+    index = {
+        "version": index_version,
+        "keys": keys,
+        "hashes": hashes,
+        "tokens": tokens,
+        "postings": [postings[token] for token in tokens],
+    }
+
+    return index, tokenized
+
+
+def save_search_index(path, index):
+    """
+    write index to compact json file, if changed. returns whether file was written.
+    """
+
+    output = json.dumps(index, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+    path = Path(path)
+    try:
+        if path.is_file() and path.read_text(encoding="utf8") == output:
+            return False
+        # swap in complete file, so site never serves partial index
+        temp = path.with_name(f".{path.name}.tmp")
+        temp.write_text(output, encoding="utf8")
+        os.replace(temp, path)
+    except Exception:
+        raise Exception("Can't write search index file")
+
+    return True
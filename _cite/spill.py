@@ -0,0 +1,259 @@
+"""
+sqlite-backed stores for bounded-memory mode, so stages that need all
+sources/citations at once (merging, deduplication, indexing) keep them on disk
+instead of in memory. each store is a temporary file, removed when closed.
+"""
+
+import os
+import pickle
+import sqlite3
+import tempfile
+
+
+# rows to fetch from disk at once when streaming back
+fetch_size = 1000
+
+
+class SpillStore:
+    """
+    entries in insertion order on disk, optionally keyed to look up and
+    update by key
+    """
+
+    def __init__(self, folder=None):
+        handle, self.path = tempfile.mkstemp(prefix="cite-", suffix=".sqlite", dir=folder)
+        os.close(handle)
+        self.database = sqlite3.connect(self.path, check_same_thread=False)
+        # temporary data, no need to survive crashes
+        self.database.execute("pragma journal_mode = off")
+        self.database.execute("pragma synchronous = off")
+        self.database.execute(
+            "create table entries (position integer primary key, key text unique, data blob)"
+        )
+        self.count = 0
+
+    def add(self, entry, key=None):
+        """
+        store entry at end, under key if given
+        """
+
+        self.database.execute(
+            "insert into entries (key, data) values (?, ?)", (key, pickle.dumps(entry))
+        )
+        self.count += 1
+
+    def get(self, key):
+        """
+        get entry stored under key, or none
+        """
+
+        row = self.database.execute("select data from entries where key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def replace(self, key, entry):
+        """
+        update entry stored under key, keeping its position
+        """
+
+        self.database.execute(
+            "update entries set data = ? where key = ?", (pickle.dumps(entry), key)
+        )
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """
+        stream entries back in insertion order, a batch at a time
+        """
+
+        self.database.commit()
+        cursor = self.database.execute("select data from entries order by position")
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for (data,) in rows:
+                yield pickle.loads(data)
+
+    def close(self):
+        self.database.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class IndexStore:
+    """
+    on-disk summary of each citation in output order (key, date, year, venue,
+    type, and member slugs), to group citations by, newest first, without
+    keeping them in memory
+    """
+
+    # columns citations can be grouped by
+    columns = ["year", "venue", "type"]
+
+    def __init__(self, folder=None):
+        handle, self.path = tempfile.mkstemp(prefix="cite-", suffix=".sqlite", dir=folder)
+        os.close(handle)
+        self.database = sqlite3.connect(self.path, check_same_thread=False)
+        self.database.execute("pragma journal_mode = off")
+        self.database.execute("pragma synchronous = off")
+        self.database.execute(
+            "create table citations "
+            "(position integer primary key, key text, date text, year text, venue text, type text)"
+        )
+        self.database.execute("create table members (slug text, position integer)")
+        self.count = 0
+        self.indexed = False
+
+    def add(self, key, date, venue, _type, members=()):
+        """
+        add summary of next citation
+        """
+
+        self.database.execute(
+            "insert into citations values (?, ?, ?, ?, ?, ?)",
+            (self.count, key, date, date[:4], venue, _type),
+        )
+        self.database.executemany(
+            "insert into members values (?, ?)", [(slug, self.count) for slug in members]
+        )
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def query(self, sql, values=()):
+        """
+        stream rows of query, a batch at a time
+        """
+
+        if not self.indexed:
+            self.database.commit()
+            for column in IndexStore.columns:
+                self.database.execute(f"create index {column}s on citations ({column})")
+            self.database.execute("create index slugs on members (slug)")
+            self.indexed = True
+
+        cursor = self.database.execute(sql, values)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def keys(self):
+        """
+        (key, position) of each citation key, in order first seen, with
+        position of last citation with that key
+        """
+
+        return self.query(
+            "select key, max(position) from citations group by key order by min(position)"
+        )
+
+    def recent(self):
+        """
+        positions of citations, newest first, ties in reverse output order
+        """
+
+        rows = self.query("select position from citations order by date desc, position desc")
+        return (row[0] for row in rows)
+
+    def names(self, column):
+        """
+        distinct values of column (or member slugs), in order first seen
+        among citations newest first
+        """
+
+        if column == "member":
+            rows = self.query(
+                "select slug from members join citations using (position) "
+                "order by date desc, position desc"
+            )
+        else:
+            rows = self.query(f"select {column} from citations order by date desc, position desc")
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def positions(self, column, name):
+        """
+        positions of citations with value of column (or member slug), newest
+        first, ties in reverse output order
+        """
+
+        if column == "member":
+            rows = self.query(
+                "select position from members join citations using (position) "
+                "where slug = ? order by date desc, position desc",
+                (name,),
+            )
+        else:
+            rows = self.query(
+                f"select position from citations where {column} = ? order by date desc, position desc",
+                (name,),
+            )
+        return (row[0] for row in rows)
+
+    def close(self):
+        self.database.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ShingleIndex:
+    """
+    on-disk set of word n-grams of titles, with a title each was seen in, to
+    find titles sharing a run of n consecutive words without comparing every
+    pair of titles
+    """
+
+    def __init__(self, size, folder=None):
+        self.size = size
+        handle, self.path = tempfile.mkstemp(prefix="cite-", suffix=".sqlite", dir=folder)
+        os.close(handle)
+        self.database = sqlite3.connect(self.path, check_same_thread=False)
+        self.database.execute("pragma journal_mode = off")
+        self.database.execute("pragma synchronous = off")
+        self.database.execute("create table shingles (shingle text primary key, title text)")
+
+    def shingles(self, words):
+        """
+        runs of n consecutive words
+        """
+
+        return [" ".join(words[i : i + self.size]) for i in range(len(words) - self.size + 1)]
+
+    def add(self, words, title):
+        """
+        add n-grams of title's words
+        """
+
+        self.database.executemany(
+            "insert or ignore into shingles values (?, ?)",
+            [(shingle, title) for shingle in self.shingles(words)],
+        )
+
+    def match(self, words):
+        """
+        get a title added before that shares n consecutive words with these,
+        or none
+        """
+
+        for shingle in self.shingles(words):
+            row = self.database.execute(
+                "select title from shingles where shingle = ?", (shingle,)
+            ).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def close(self):
+        self.database.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -2,62 +2,157 @@
 utility functions for cite process and plugins
 """
 
+import os
+import sys
+import hashlib
 import subprocess
 import json
 import yaml
 from yaml.loader import SafeLoader
 from pathlib import Path
+from collections.abc import Iterator
 from datetime import date, datetime
+from functools import lru_cache, wraps
+from threading import current_thread, main_thread
 from rich import print
+from rich.progress import Progress
 from diskcache import Cache
 
 
-# cache for time-consuming network requests
-cache = Cache("./_cite/.cache")
+# cache for time-consuming network requests. next to this file by default, so
+# it's the same no matter where cite process is run or imported from.
+cache = Cache(os.environ.get("CITE_CACHE_DIR") or str(Path(__file__).parent / ".cache"))
 
 
 # clear expired items from cache
 cache.expire()
 
 
+# seconds to wait on network requests before giving up
+request_timeout = 60
+
+
 def log_cache(func):
     """
     decorator to use around memoized function to log if cached or or not
+    (only logged from main thread, as parallel runs would interleave output)
     """
 
+    @wraps(func)
     def wrap(*args):
         key = func.__cache_key__(*args)
-        if key in cache:
+        if key in cache and current_thread() is main_thread():
             log(" (from cache)", level="INFO", newline=False)
         return func(*args)
 
     return wrap
 
 
-def log(message="\n--------------------\n", indent=0, level="", newline=True):
+# log output settings, see configure_log
+log_config = {
+    # "rich" (colored, flushed each message), "plain" (buffered, no markup
+    # rendering), or "progress" (rich, with progress bars instead of messages)
+    "mode": "rich",
+    # deepest indent level to show. errors/warnings/successes always shown.
+    "verbosity": 3,
+    # whether last new-line message was shown, to also hide its continuations
+    "shown": True,
+}
+
+# log colors by level or indent, as rich color names
+log_colors = {
+    0: "orange1",
+    1: "salmon1",
+    2: "violet",
+    3: "sky_blue1",
+    "ERROR": "#F43F5E",
+    "WARNING": "#EAB308",
+    "SUCCESS": "#10B981",
+    "INFO": "grey70",
+}
+
+# same colors as ansi escape codes, for plain mode
+log_ansi = {
+    "orange1": "38;5;214",
+    "salmon1": "38;5;209",
+    "violet": "38;5;177",
+    "sky_blue1": "38;5;117",
+    "#F43F5E": "38;2;244;63;94",
+    "#EAB308": "38;2;234;179;8",
+    "#10B981": "38;2;16;185;129",
+    "grey70": "38;5;249",
+    "white": "38;5;15",
+}
+
+log_prefixes = {
+    "ERROR": "🚫 ERROR: ",
+    "WARNING": "⚠️ WARNING: ",
+}
+
+
+def configure_log(mode="auto", verbosity=None):
+    """
+    set log output mode and verbosity. "auto" mode picks rich for interactive
+    terminals and plain otherwise. progress mode only shows errors, warnings,
+    and successes by default.
+    """
+
+    if mode == "auto":
+        mode = "rich" if sys.stdout.isatty() else "plain"
+    log_config["mode"] = mode
+    if verbosity is not None:
+        log_config["verbosity"] = verbosity
+    elif mode == "progress":
+        log_config["verbosity"] = -1
+
+
+def log(message="\n--------------------\n", indent=0, level="", newline=True, depth=None):
     """
-    log to terminal, color determined by indent and level
+    log to terminal, color determined by indent and level. depth is level of
+    detail to filter by verbosity, defaulting to indent (or level if number).
     """
 
-    colors = {
-        0: "[orange1]",
-        1: "[salmon1]",
-        2: "[violet]",
-        3: "[sky_blue1]",
-        "ERROR": "[#F43F5E]",
-        "WARNING": "[#EAB308]",
-        "SUCCESS": "[#10B981]",
-        "INFO": "[grey70]",
-    }
-    prefixes = {
-        "ERROR": "🚫 ERROR: ",
-        "WARNING": "⚠️ WARNING: ",
-    }
-    color = get_safe(colors, level, "") or get_safe(colors, indent, "") or "[white]"
-    prefix = get_safe(prefixes, level, "")
+    if depth is None:
+        depth = level if isinstance(level, int) else indent
+
+    # skip details beyond verbosity
+    if newline:
+        log_config["shown"] = (
+            level in ["ERROR", "WARNING", "SUCCESS"] or depth <= log_config["verbosity"]
+        )
+    if not log_config["shown"]:
+        return
+
+    color = get_safe(log_colors, level, "") or get_safe(log_colors, indent, "") or "white"
+    prefix = get_safe(log_prefixes, level, "")
+    text = indent * "    " + prefix + str(message)
+
+    # plain text, left to stream's own buffering
+    if log_config["mode"] == "plain":
+        if os.environ.get("FORCE_COLOR"):
+            text = f"\033[{log_ansi[color]}m{text}\033[0m"
+        sys.stdout.write(("\n" if newline else "") + text)
+        return
+
     if newline:
         print()
-    print(indent * "    " + color + prefix + str(message) + "[/]", end="", flush=True)
+    print(f"[{color}]{text}[/]", end="", flush=True)
+
+
+def progress(items, description, total=None):
+    """
+    show progress bar while iterating items, in progress log mode only
+    """
+
+    if log_config["mode"] != "progress":
+        yield from items
+        return
+
+    with Progress(transient=True) as bar:
+        task = bar.add_task(description, total=total)
+        for item in items:
+            yield item
+            bar.advance(task)
 
 
 def label(entry):
@@ -68,21 +163,75 @@ def label(entry):
     return str(list(entry.keys())[0]) + ": " + str(list(entry.values())[0])
 
 
-def get_safe(item, path, default=None):
+# errors that mean value at path doesn't exist
+missing = (KeyError, IndexError, AttributeError, TypeError)
+
+
+@lru_cache(maxsize=1024)
+def getter(path):
     """
-    safely access value in nested lists/dicts
+    compile path to nested value (e.g. "a.0.b") into a fast accessor function,
+    called as accessor(item, default). parsed once and cached per path.
     """
 
+    parts = []
     for part in str(path).split("."):
         try:
             part = int(part)
         except ValueError:
             part = part
-        try:
-            item = item[part]
-        except (KeyError, IndexError, AttributeError, TypeError):
-            return default
-    return item
+        parts.append(part)
+
+    # fast path for single key
+    if len(parts) == 1:
+        key = parts[0]
+
+        def get(item, default=None):
+            try:
+                return item[key]
+            except missing:
+                return default
+
+        return get
+
+    parts = tuple(parts)
+
+    def get(item, default=None):
+        for part in parts:
+            try:
+                item = item[part]
+            except missing:
+                return default
+        return item
+
+    return get
+
+
+def get_safe(item, path, default=None):
+    """
+    safely access value in nested lists/dicts
+    """
+
+    return getter(path)(item, default)
+
+
+def is_arxiv_paper(citation):
+    """
+    Check if a citation is an arXiv/preprint paper.
+    Based on bibtex-to-manubot deduplication logic.
+    """
+    _id = get_id(citation, "").lower()
+    publisher = get_publisher(citation, "").lower()
+    link = get_link(citation, "").lower()
+
+    # Check various indicators of arXiv papers
+    if "arxiv" in _id:
+        return True
+    if publisher in ["arxiv", "corr"]:
+        return True
+    if "arxiv.org" in link:
+        return True
+    return False
 
 
 def index_of(_list, value, fallback=float("inf")):
@@ -148,43 +297,250 @@ def load_data(path):
     return data
 
 
-def save_data(path, data):
+def content_hash(text):
     """
-    write data to yaml file
+    hash of file contents, to tell if anything changed
     """
 
-    # convert to path object
-    path = Path(path)
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
 
-    # try to open file
-    try:
-        file = open(path, mode="w")
-    except Exception:
-        raise Exception("Can't open file for writing")
+
+class StagedFile:
+    """
+    text file to replace, only written to disk if new contents differ from
+    current file. text is compared with current file as it's written, and
+    nothing is written until they first differ. then the part that matched is
+    copied from current file to a temporary file next to it, and the rest
+    goes there too, to swap in once complete.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20):
+        self.path = Path(path)
+        self.temp = self.path.with_name(f".{self.path.name}.tmp")
+        self.chunk_size = chunk_size
+        # characters of current file matched so far
+        self.matched = 0
+        self.current = None
+        self.file = None
+        try:
+            self.current = open(self.path, "r", encoding="utf8")
+        except OSError:
+            self.start()
+
+    def start(self):
+        """
+        start temporary file, with part of current file that matched so far
+        """
+
+        self.file = open(self.temp, "w", encoding="utf8")
+        if self.current:
+            self.current.close()
+            self.current = None
+            with open(self.path, "r", encoding="utf8") as current:
+                remaining = self.matched
+                while remaining:
+                    chunk = current.read(min(remaining, self.chunk_size))
+                    if not chunk:
+                        break
+                    self.file.write(chunk)
+                    remaining -= len(chunk)
+
+    def write(self, text):
+        if self.file is None:
+            if self.current.read(len(text)) == text:
+                self.matched += len(text)
+                return
+            self.start()
+        self.file.write(text)
+
+    def finish(self):
+        """
+        finish writing. returns whether contents changed (and temporary file
+        is ready to swap in).
+        """
+
+        if self.file is None:
+            # current file has nothing more than what was written
+            if self.current.read(1) == "":
+                self.current.close()
+                self.current = None
+                return False
+            self.start()
+        self.file.close()
+        return True
+
+    def replace(self):
+        """
+        swap complete temporary file in for current file
+        """
+
+        os.replace(self.temp, self.path)
+
+    def discard(self):
+        """
+        close files and remove temporary file, if any
+        """
+
+        for file in [self.current, self.file]:
+            if file:
+                file.close()
+        self.temp.unlink(missing_ok=True)
+
+
+class LazyMapping:
+    """
+    mapping whose items come from an iterable of key/value pairs, read once as
+    it's saved (see save_data), so they're never all in memory at once
+    """
+
+    def __init__(self, items):
+        self.pairs = items
+
+    def items(self):
+        return self.pairs
+
+
+def node_events(dumper, node):
+    """
+    yaml events of represented node, as yaml serializer emits them (without
+    anchors/aliases)
+    """
+
+    if isinstance(node, yaml.ScalarNode):
+        detected = dumper.resolve(yaml.ScalarNode, node.value, (True, False))
+        default = dumper.resolve(yaml.ScalarNode, node.value, (False, True))
+        implicit = (node.tag == detected, node.tag == default)
+        yield yaml.ScalarEvent(None, node.tag, implicit, node.value, style=node.style)
+    elif isinstance(node, yaml.SequenceNode):
+        implicit = node.tag == dumper.resolve(yaml.SequenceNode, node.value, True)
+        yield yaml.SequenceStartEvent(None, node.tag, implicit, flow_style=node.flow_style)
+        for item in node.value:
+            yield from node_events(dumper, item)
+        yield yaml.SequenceEndEvent()
+    else:
+        implicit = node.tag == dumper.resolve(yaml.MappingNode, node.value, True)
+        yield yaml.MappingStartEvent(None, node.tag, implicit, flow_style=node.flow_style)
+        for key, value in node.value:
+            yield from node_events(dumper, key)
+            yield from node_events(dumper, value)
+        yield yaml.MappingEndEvent()
+
+
+def data_events(dumper, data):
+    """
+    yaml events of data, same as yaml.dump gives. values of dicts/lazy
+    mappings, and items of iterators (e.g. generators), are only read as
+    they're emitted.
+    """
+
+    if isinstance(data, (dict, LazyMapping)):
+        tag = "tag:yaml.org,2002:map"
+        yield yaml.MappingStartEvent(None, tag, True, flow_style=False)
+        for key, value in data.items():
+            yield from data_events(dumper, key)
+            yield from data_events(dumper, value)
+        yield yaml.MappingEndEvent()
+    elif isinstance(data, Iterator):
+        tag = "tag:yaml.org,2002:seq"
+        yield yaml.SequenceStartEvent(None, tag, True, flow_style=False)
+        for item in data:
+            yield from data_events(dumper, item)
+        yield yaml.SequenceEndEvent()
+    else:
+        yield from node_events(dumper, dumper.represent_data(data))
+
+
+def save_data(path, data, staged=None):
+    """
+    write data to yaml file. data can be a dict (or lazy mapping), rendered
+    one value at a time, or a list or any iterable of entries, rendered one at
+    a time as they arrive. file is left untouched
+    if contents would be unchanged. returns whether file was written. if staged
+    list given, complete file is added to it instead of swapped in, to swap in
+    with other files at once (see swap_files).
+    """
 
     # prevent yaml anchors/aliases (pointers)
     yaml.Dumper.ignore_aliases = lambda *args: True
 
-    # try to save data as yaml
+    # warning note to top of file
+    note = "# DO NOT EDIT, GENERATED AUTOMATICALLY"
+
+    # compare with current file one list item at a time, so output is never
+    # held in memory in full, and nothing is written if it's unchanged
+    file = StagedFile(path)
     try:
-        with file:
-            yaml.dump(data, file, default_flow_style=False, sort_keys=False)
+        file.write(f"{note}\n\n")
+        if isinstance(data, (dict, LazyMapping)):
+            dumper = yaml.Dumper(file, default_flow_style=False, sort_keys=False)
+            dumper.emit(yaml.StreamStartEvent())
+            dumper.emit(yaml.DocumentStartEvent(explicit=False))
+            for event in data_events(dumper, data):
+                dumper.emit(event)
+            dumper.emit(yaml.DocumentEndEvent(explicit=False))
+            dumper.emit(yaml.StreamEndEvent())
+        else:
+            empty = True
+            for entry in data:
+                empty = False
+                file.write(yaml.dump([entry], default_flow_style=False, sort_keys=False))
+            if empty:
+                file.write(yaml.dump([], default_flow_style=False, sort_keys=False))
+        changed = file.finish()
     except Exception:
+        file.discard()
         raise Exception("Can't save YAML to file")
 
-    # write warning note to top of file
-    note = "# DO NOT EDIT, GENERATED AUTOMATICALLY"
+    if not changed:
+        return False
+
+    if staged is not None:
+        staged.append(file)
+        return True
+
+    # swap in complete file
+    swap_files([file])
+
+    return True
+
+
+def swap_files(staged):
+    """
+    swap in complete files staged by save_data, one right after another, so
+    readers don't see some files updated long before others
+    """
+
     try:
-        with open(path, "r") as file:
-            data = file.read()
-        with open(path, "w") as file:
-            file.write(f"{note}\n\n{data}")
+        for file in staged:
+            file.replace()
     except Exception:
+        for file in staged:
+            file.discard()
         raise Exception("Can't write to file")
 
 
+# compiled getters for common source/citation fields
+get_id = getter("id")
+get_title = getter("title")
+get_publisher = getter("publisher")
+get_date = getter("date")
+get_link = getter("link")
+
+# compiled getters for manubot (csl-json) fields
+get_author = getter("author")
+get_given = getter("given")
+get_family = getter("family")
+get_container = getter("container-title")
+get_collection = getter("collection-title")
+get_url = getter("URL")
+
+
+# seconds to keep manubot citations in cache
+manubot_expire = 90 * (60 * 60 * 24)
+
+
 @log_cache
-@cache.memoize(name="manubot", expire=90 * (60 * 60 * 24))
+@cache.memoize(name="manubot", expire=manubot_expire)
 def cite_with_manubot(_id):
     """
     generate citation data for source id with Manubot
@@ -204,6 +560,14 @@ def cite_with_manubot(_id):
     except Exception:
         raise Exception("Couldn't parse Manubot response")
 
+    return csl_citation(_id, manubot)
+
+
+def csl_citation(_id, manubot):
+    """
+    get citation data cite process needs from csl-json item (as manubot gives)
+    """
+
     # new citation with only needed info
     citation = {}
 
@@ -211,20 +575,20 @@ def cite_with_manubot(_id):
     citation["id"] = _id
 
     # title
-    citation["title"] = get_safe(manubot, "title", "").strip()
+    citation["title"] = get_title(manubot, "").strip()
 
     # authors
     citation["authors"] = []
-    for author in get_safe(manubot, "author", {}):
-        given = get_safe(author, "given", "").strip()
-        family = get_safe(author, "family", "").strip()
+    for author in get_author(manubot, {}):
+        given = get_given(author, "").strip()
+        family = get_family(author, "").strip()
         if given or family:
             citation["authors"].append(" ".join([given, family]))
 
     # publisher
-    container = get_safe(manubot, "container-title", "").strip()
-    collection = get_safe(manubot, "collection-title", "").strip()
-    publisher = get_safe(manubot, "publisher", "").strip()
+    container = get_container(manubot, "").strip()
+    collection = get_collection(manubot, "").strip()
+    publisher = get_publisher(manubot, "").strip()
     citation["publisher"] = container or publisher or collection or ""
 
     # extract date part
@@ -246,7 +610,7 @@ def cite_with_manubot(_id):
         citation["date"] = ""
 
     # link
-    citation["link"] = get_safe(manubot, "URL", "").strip()
+    citation["link"] = get_url(manubot, "").strip()
 
     # return citation data
     return citation
@@ -2,6 +2,12 @@
   filters elements on page based on url or search box.
   syntax: term1 term2 "full phrase 1" "full phrase 2" "tag: tag 1"
   match if: all terms AND at least one phrase AND at least one tag
+  citations rendered from unmodified citation data (data-indexed attribute)
+  are matched on terms with prebuilt index from cite process, if search box
+  has data-index attribute. there, each word of term must start a word of
+  citation (e.g. "odom" finds "odometry", "dometry" doesn't), instead of
+  appearing anywhere in its text. other elements (e.g. highlight cards with
+  their own text) and phrases are always matched on text.
 */
 {
   // elements to filter
@@ -13,6 +19,50 @@
   // tags element
   const tagSelector = ".tag";
 
+  // prebuilt citation search index, once loaded
+  let searchIndex = null;
+
+  // split text into folded words. must match tokenize in _cite/search.py.
+  const tokenize = (text) =>
+    text
+      .normalize("NFKD")
+      .replace(/\p{M}/gu, "")
+      .toLowerCase()
+      .match(/[\p{L}\p{N}]+/gu) || [];
+
+  // get positions of citations with any token starting with prefix
+  const lookupPrefix = (prefix) => {
+    const { tokens, postings } = searchIndex;
+
+    // binary search for first token not before prefix
+    let low = 0;
+    let high = tokens.length;
+    while (low < high) {
+      const middle = (low + high) >> 1;
+      if (tokens[middle] < prefix) low = middle + 1;
+      else high = middle;
+    }
+
+    // collect postings of run of tokens starting with prefix
+    const positions = new Set();
+    for (let i = low; i < tokens.length && tokens[i].startsWith(prefix); i++)
+      for (const position of postings[i]) positions.add(position);
+
+    return positions;
+  };
+
+  // get citation keys matching all words of term
+  const lookupTerm = (term) => {
+    let matches = null;
+    for (const word of tokenize(term)) {
+      const positions = lookupPrefix(word);
+      matches = matches
+        ? new Set([...matches].filter((position) => positions.has(position)))
+        : positions;
+    }
+    return new Set([...(matches || [])].map((position) => searchIndex.keys[position]));
+  };
+
   // split search query into terms, phrases, and tags
   const splitQuery = (query) => {
     // split into parts, preserve quotes
@@ -47,7 +97,7 @@
       .join(" ");
 
   // determine if element should show up in results based on query
-  const elementMatches = (element, { terms, phrases, tags }) => {
+  const elementMatches = (element, { terms, phrases, tags }, termKeys) => {
     // tag elements within element
     const tagElements = [...element.querySelectorAll(".tag")];
 
@@ -64,9 +114,19 @@
     const hasTag = (string) =>
       tagElements.some((tag) => normalizeTag(tag.innerText) === string);
 
+    // check if term matches element in search index, if indexed, otherwise
+    // fall back to its text
+    const key = element.dataset.key;
+    const indexed =
+      termKeys &&
+      element.hasAttribute("data-indexed") &&
+      searchIndex.keySet.has(key);
+    const hasTerm = (term, index) =>
+      indexed ? termKeys[index].has(key) : hasText(term);
+
     // match logic
     return (
-      (terms.every(hasText) || !terms.length) &&
+      (terms.every(hasTerm) || !terms.length) &&
       (phrases.some(hasText) || !phrases.length) &&
       (tags.some(hasTag) || !tags.length)
     );
@@ -81,9 +141,12 @@
     let n = elements.length;
     let tags = parts.tags;
 
+    // look up terms in search index once, instead of scanning each element
+    const termKeys = searchIndex ? parts.terms.map(lookupTerm) : null;
+
     // filter elements
     for (const element of elements) {
-      if (elementMatches(element, parts)) {
+      if (elementMatches(element, parts, termKeys)) {
         element.style.display = "";
         x++;
       } else element.style.display = "none";
@@ -208,8 +271,25 @@
     updateUrl();
   };
 
+  // load search index, if page has one
+  const loadIndex = async () => {
+    const box = document.querySelector(`${searchBoxSelector}[data-index]`);
+    if (!box) return;
+    try {
+      const response = await fetch(box.dataset.index);
+      if (!response.ok) return;
+      searchIndex = await response.json();
+      searchIndex.keySet = new Set(searchIndex.keys);
+    } catch (error) {
+      // fall back to searching page text
+      return;
+    }
+    searchFromUrl();
+  };
+
   // after page loads
   window.addEventListener("load", searchFromUrl);
+  window.addEventListener("load", loadIndex);
   // after tags load
   window.addEventListener("tagsfetched", searchFromUrl);
 }
@@ -17,7 +17,7 @@ Requirements:
 import os
 import sys
 import argparse
-import subprocess
+from itertools import islice
 from pathlib import Path
 
 # Add _cite to path for imports
@@ -42,6 +42,9 @@ console = Console()
 # Paths relative to project root
 PROJECT_ROOT = Path(__file__).parent.parent
 CITATIONS_FILE = PROJECT_ROOT / "_data" / "citations.yaml"
+CITATION_INDEX_FILE = PROJECT_ROOT / "_data" / "citation-index.yaml"
+CITATION_SHARDS_DIR = PROJECT_ROOT / "_data" / "citation-shards"
+CITATION_SHARDS_INDEX = CITATION_SHARDS_DIR / "index.yaml"
 HIGHLIGHTS_FILE = PROJECT_ROOT / "_data" / "highlights.yaml"
 SOURCES_FILE = PROJECT_ROOT / "_data" / "sources.yaml"
 MEMBERS_DIR = PROJECT_ROOT / "_members"
@@ -68,20 +71,103 @@ def save_yaml(path, data, header_comment=None):
 
 
 def run_citation_update():
-    """Run the citation generation script"""
+    """Run the citation generation process in-process, returning its result"""
     console.print("\n[bold blue]Running citation update...[/bold blue]")
-    # Run from project root since cite.py uses Path.cwd() for finding data files
-    result = subprocess.run(
-        [sys.executable, "_cite/cite.py"],
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True
-    )
-    if result.returncode == 0:
+    try:
+        from cite import Config, build_citations
+    except ImportError as e:
+        console.print(f"[red]Missing citation dependencies ({e}). Install with:[/red]")
+        console.print("  pip install -r _cite/requirements.txt")
+        return None
+
+    # progress bars instead of per-source log lines, errors/warnings still shown
+    result = build_citations(Config(root=PROJECT_ROOT, log_mode="progress"))
+    if result.ok:
         console.print("[green]Citations updated successfully![/green]")
     else:
-        console.print(f"[red]Error updating citations:[/red]\n{result.stderr}")
-    return result.returncode == 0
+        console.print("[red]Error updating citations:[/red]")
+        for error in result.errors:
+            console.print(f"  [red]{error}[/red]")
+    return result
+
+
+def is_sharded():
+    """Whether the cite process split citations into shards instead of one file"""
+    return not CITATIONS_FILE.exists() and CITATION_SHARDS_INDEX.exists()
+
+
+def load_citations():
+    """Load all citations, from shards if the cite process split them"""
+    if not is_sharded():
+        return load_yaml(CITATIONS_FILE)
+    shard_index = load_yaml(CITATION_SHARDS_INDEX)
+    shards = shard_index.get("shards") if isinstance(shard_index, dict) else None
+    citations = []
+    for shard in shards or []:
+        citations += load_yaml(CITATION_SHARDS_DIR / f"{shard.get('file')}.yaml")
+    return citations
+
+
+def load_citation_index():
+    """Load groupings of citations precomputed by the cite process"""
+    if is_sharded():
+        return {}
+    index = load_yaml(CITATION_INDEX_FILE)
+    if not isinstance(index, dict):
+        console.print("[yellow]No citation index found, run a citation update first.[/yellow]")
+        return {}
+    return index
+
+
+class CitationStore:
+    """Citations looked up by id and listed newest first via the precomputed index"""
+
+    def __init__(self):
+        self.citations = load_citations()
+        self.index = load_citation_index()
+        self.stamp = CitationStore.file_stamp()
+
+        # id -> position in citations
+        self.ids = self.index.get("ids") or {
+            c.get("id") or c.get("title"): i for i, c in enumerate(self.citations)
+        }
+
+    @staticmethod
+    def file_stamp():
+        """Modified times of citation files, to tell when store is stale"""
+        return tuple(
+            path.stat().st_mtime_ns if path.exists() else 0
+            for path in (CITATIONS_FILE, CITATION_INDEX_FILE, CITATION_SHARDS_INDEX)
+        )
+
+    def get(self, _id):
+        """Get citation by id, if it exists"""
+        position = self.ids.get(_id)
+        if position is None or position >= len(self.citations):
+            return None
+        return self.citations[position]
+
+    def recent(self):
+        """Iterate citations newest first"""
+        recent = self.index.get("recent") or sorted(
+            range(len(self.citations)),
+            key=lambda i: (str(self.citations[i].get("date") or ""), i),
+            reverse=True,
+        )
+        for position in recent:
+            if position < len(self.citations):
+                yield self.citations[position]
+
+
+_citation_store = None
+
+
+def get_citation_store():
+    """Get citation store, only reloading it when citation files changed"""
+    global _citation_store
+    if _citation_store is None or _citation_store.stamp != CitationStore.file_stamp():
+        _citation_store = CitationStore()
+    return _citation_store
 
 
 # ============================================================================
@@ -90,24 +176,24 @@ def run_citation_update():
 
 def show_publications_summary():
     """Display current publications summary"""
-    citations = load_yaml(CITATIONS_FILE)
+    index = load_citation_index()
     highlights = load_yaml(HIGHLIGHTS_FILE)
 
-    # Group by year
-    by_year = {}
-    for pub in citations:
-        year = pub.get("date", "")[:4] or "Unknown"
-        by_year.setdefault(year, []).append(pub)
-
     table = Table(title="Current Publications Summary")
     table.add_column("Year", style="cyan")
     table.add_column("Count", style="green")
 
-    for year in sorted(by_year.keys(), reverse=True):
-        table.add_row(year, str(len(by_year[year])))
+    # Years are already grouped, newest first (counted here if there is no index)
+    years = {year: len(positions) for year, positions in index.get("year", {}).items()}
+    if not index:
+        for citation in get_citation_store().recent():
+            year = str(citation.get("date") or "")[:4]
+            years[year] = years.get(year, 0) + 1
+    for year, count in years.items():
+        table.add_row(str(year) or "Unknown", str(count))
 
     table.add_row("─" * 10, "─" * 5)
-    table.add_row("[bold]Total[/bold]", f"[bold]{len(citations)}[/bold]")
+    table.add_row("[bold]Total[/bold]", f"[bold]{sum(years.values())}[/bold]")
     table.add_row("[yellow]Highlights[/yellow]", f"[yellow]{len(highlights)}[/yellow]")
 
     console.print(table)
@@ -146,36 +232,31 @@ def update_from_dblp():
     """Update publications using DBLP plugin"""
     console.print("\n[bold]Updating from DBLP...[/bold]")
 
-    # Load current citations for comparison
-    old_citations = load_yaml(CITATIONS_FILE)
-    old_ids = {c.get("id") for c in old_citations if c.get("id")}
-
-    # Run the citation update
-    if run_citation_update():
-        # Compare with new citations
-        new_citations = load_yaml(CITATIONS_FILE)
-        new_ids = {c.get("id") for c in new_citations if c.get("id")}
-
-        added = new_ids - old_ids
+    # Run the citation update, which reports what changed
+    result = run_citation_update()
+    if result and result.ok:
+        added = result.changes["added"]
         if added:
             console.print(f"\n[green]Found {len(added)} new publication(s):[/green]")
-            for pub in new_citations:
-                if pub.get("id") in added:
-                    console.print(f"  • {pub.get('title', 'Untitled')[:60]}...")
+            for pub in added.values():
+                console.print(f"  • {pub.get('title', 'Untitled')[:60]}...")
         else:
             console.print("\n[yellow]No new publications found.[/yellow]")
+        if result.changed:
+            console.print(f"[dim]{len(result.changed)} existing publication(s) updated.[/dim]")
+            stale = HighlightsService().stale()
+            if stale:
+                console.print(
+                    f"[yellow]{len(stale)} highlight(s) differ from their citation. "
+                    "Review them with 'Sync highlights with latest citations' "
+                    "in the highlights menu.[/yellow]"
+                )
 
 
 def show_recent_publications(limit=10):
     """Show the most recent publications"""
-    citations = load_yaml(CITATIONS_FILE)
-
-    # Sort by date
-    sorted_pubs = sorted(
-        citations,
-        key=lambda x: x.get("date", "") or "",
-        reverse=True
-    )[:limit]
+    # Citations are already sorted newest first in the store
+    sorted_pubs = list(islice(get_citation_store().recent(), limit))
 
     table = Table(title=f"Recent {limit} Publications")
     table.add_column("Date", style="cyan", width=12)
@@ -196,18 +277,135 @@ def show_recent_publications(limit=10):
 # HIGHLIGHTS MANAGEMENT
 # ============================================================================
 
+HIGHLIGHTS_HEADER = (
+    "Featured/highlighted publications with custom images and descriptions\n"
+    "# This file is manually maintained and won't be overwritten by auto-generation"
+)
+
+# Highlight fields that can be refreshed from citations by HighlightsService.sync.
+# Venue and link are often curated by hand, so they're never overwritten.
+HIGHLIGHT_SYNC_FIELDS = ["title", "authors", "date"]
+
+
+class HighlightsService:
+    """Highlights, with citations looked up by id from the citation store"""
+
+    def __init__(self, store=None):
+        self.store = store or get_citation_store()
+        self.highlights = load_yaml(HIGHLIGHTS_FILE)
+        self.ids = {h.get("id") for h in self.highlights}
+
+    def save(self):
+        """Write highlights file"""
+        save_yaml(HIGHLIGHTS_FILE, self.highlights, HIGHLIGHTS_HEADER)
+        self.ids = {h.get("id") for h in self.highlights}
+
+    def available(self, limit=30):
+        """Most recent citations that aren't highlighted yet"""
+        citations = (c for c in self.store.recent() if c.get("id") not in self.ids)
+        return list(islice(citations, limit))
+
+    def add(self, pub, description="", image=""):
+        """Add citation to highlights"""
+        highlight = {
+            "id": pub.get("id"),
+            "title": pub.get("title"),
+            "authors": pub.get("authors", []),
+            "publisher": pub.get("publisher", ""),
+            "date": pub.get("date", ""),
+            "link": pub.get("link", ""),
+            "type": pub.get("type", "paper-conference"),
+        }
+        if description:
+            highlight["description"] = description
+        if image:
+            highlight["image"] = image
+
+        self.highlights.append(highlight)
+        self.save()
+        return highlight
+
+    def remove(self, index):
+        """Remove highlight at index"""
+        removed = self.highlights.pop(index)
+        self.save()
+        return removed
+
+    def reorder(self, indices):
+        """Put highlights in new order, given as list of current indices"""
+        if len(indices) != len(self.highlights):
+            raise ValueError("Must include all items")
+        if sorted(indices) != list(range(len(self.highlights))):
+            raise ValueError("Invalid indices")
+        self.highlights = [self.highlights[i] for i in indices]
+        self.save()
+
+    def stale(self):
+        """Fields of highlights that differ from their latest citation, by highlight index"""
+        changes = {}
+        for i, highlight in enumerate(self.highlights):
+            citation = self.store.get(highlight.get("id"))
+            if not citation:
+                continue
+            fields = {
+                key: citation[key]
+                for key in HIGHLIGHT_SYNC_FIELDS
+                if key in citation and citation[key] != highlight.get(key)
+            }
+            if fields:
+                changes[i] = fields
+        return changes
+
+    def sync(self, changes=None):
+        """Refresh stale citation fields of highlights (all, or given changes) in one pass, returning what changed"""
+        changes = self.stale() if changes is None else changes
+        for i, fields in changes.items():
+            self.highlights[i].update(fields)
+        if changes:
+            self.save()
+        return changes
+
+
+def sync_highlights(service=None):
+    """Show how highlights differ from latest citation info, and update them if confirmed"""
+    service = service or HighlightsService()
+    changes = service.stale()
+    if not changes:
+        console.print("[dim]Highlights are up to date with citations.[/dim]")
+        return
+
+    console.print(f"\n[bold]{len(changes)} highlight(s) differ from their citation:[/bold]")
+    for i, fields in changes.items():
+        highlight = service.highlights[i]
+        console.print(f"  • {highlight.get('title', 'Untitled')[:50]}")
+        for key, value in fields.items():
+            console.print(f"      {key}: [red]{highlight.get(key)}[/red] → [green]{value}[/green]")
+
+    answer = inquirer.prompt(
+        [inquirer.Confirm("confirm", message="Apply these changes to highlights?", default=False)]
+    )
+    if not answer or not answer["confirm"]:
+        console.print("[dim]Highlights left unchanged.[/dim]")
+        return
+
+    service.sync(changes)
+    console.print(f"[green]Synced {len(changes)} highlight(s) with latest citations.[/green]")
+
+
 def manage_highlights_menu():
     """Interactive menu for managing research highlights"""
     console.print(Panel("[bold]Research Highlights Management[/bold]", style="yellow"))
 
-    highlights = load_yaml(HIGHLIGHTS_FILE)
-    citations = load_yaml(CITATIONS_FILE)
+    service = HighlightsService()
+    highlights = service.highlights
 
     # Show current highlights
     console.print("\n[bold]Current Highlights:[/bold]")
     if highlights:
+        stale = service.stale()
         for i, h in enumerate(highlights, 1):
-            console.print(f"  {i}. {h.get('title', 'Untitled')[:60]}")
+            note = " [yellow](outdated)[/yellow]" if i - 1 in stale else ""
+            console.print(f"  {i}. {h.get('title', 'Untitled')[:60]}{note}")
     else:
         console.print("  [dim]No highlights configured[/dim]")
 
@@ -220,6 +418,7 @@ def manage_highlights_menu():
                 ("Remove a highlight", "remove"),
                 ("Reorder highlights", "reorder"),
                 ("Edit highlight description/image", "edit"),
+                ("Sync highlights with latest citations", "sync"),
                 ("Back to main menu", "back"),
             ],
         )
@@ -232,34 +431,30 @@ def manage_highlights_menu():
     action = answer["action"]
 
     if action == "add":
-        add_highlight(citations, highlights)
+        add_highlight(service)
     elif action == "remove":
-        remove_highlight(highlights)
+        remove_highlight(service)
     elif action == "reorder":
-        reorder_highlights(highlights)
+        reorder_highlights(service)
     elif action == "edit":
-        edit_highlight(highlights)
+        edit_highlight(service)
+    elif action == "sync":
+        sync_highlights(service)
 
 
-def add_highlight(citations, highlights):
+def add_highlight(service):
     """Add a new publication to highlights"""
-    # Get IDs of current highlights
-    highlight_ids = {h.get("id") for h in highlights}
-
-    # Filter out already highlighted publications
-    available = [c for c in citations if c.get("id") not in highlight_ids]
+    # Most recent publications not highlighted yet
+    available = service.available(limit=30)
 
     if not available:
         console.print("[yellow]All publications are already highlighted![/yellow]")
         return
 
-    # Sort by date (most recent first)
-    available.sort(key=lambda x: x.get("date", "") or "", reverse=True)
-
     # Create choices
     choices = [
         (f"{p.get('date', 'N/A')[:4]} - {p.get('title', 'Untitled')[:50]}", p)
-        for p in available[:30]  # Limit to recent 30
+        for p in available
     ]
 
     questions = [
@@ -294,35 +489,13 @@ def add_highlight(citations, highlights):
     if not details:
         return
 
-    # Create highlight entry
-    highlight = {
-        "id": pub.get("id"),
-        "title": pub.get("title"),
-        "authors": pub.get("authors", []),
-        "publisher": pub.get("publisher", ""),
-        "date": pub.get("date", ""),
-        "link": pub.get("link", ""),
-        "type": pub.get("type", "paper-conference"),
-    }
-
-    if details["description"]:
-        highlight["description"] = details["description"]
-    if details["image"]:
-        highlight["image"] = details["image"]
-
-    highlights.append(highlight)
-
-    # Save
-    save_yaml(
-        HIGHLIGHTS_FILE,
-        highlights,
-        "Featured/highlighted publications with custom images and descriptions\n# This file is manually maintained and won't be overwritten by auto-generation"
-    )
+    service.add(pub, details["description"], details["image"])
     console.print(f"[green]Added '{pub.get('title')[:40]}...' to highlights![/green]")
 
 
-def remove_highlight(highlights):
+def remove_highlight(service):
     """Remove a publication from highlights"""
+    highlights = service.highlights
     if not highlights:
         console.print("[yellow]No highlights to remove.[/yellow]")
         return
@@ -341,17 +514,13 @@ def remove_highlight(highlights):
     if not answer:
         return
 
-    removed = highlights.pop(answer["index"])
-    save_yaml(
-        HIGHLIGHTS_FILE,
-        highlights,
-        "Featured/highlighted publications with custom images and descriptions\n# This file is manually maintained and won't be overwritten by auto-generation"
-    )
+    removed = service.remove(answer["index"])
     console.print(f"[green]Removed '{removed.get('title')[:40]}...' from highlights.[/green]")
 
 
-def reorder_highlights(highlights):
+def reorder_highlights(service):
     """Reorder highlights"""
+    highlights = service.highlights
     if len(highlights) < 2:
         console.print("[yellow]Need at least 2 highlights to reorder.[/yellow]")
         return
@@ -373,25 +542,16 @@ def reorder_highlights(highlights):
 
     try:
         new_indices = [int(x.strip()) - 1 for x in answer["new_order"].split(",")]
-        if len(new_indices) != len(highlights):
-            raise ValueError("Must include all items")
-        if sorted(new_indices) != list(range(len(highlights))):
-            raise ValueError("Invalid indices")
-
-        new_highlights = [highlights[i] for i in new_indices]
-        save_yaml(
-            HIGHLIGHTS_FILE,
-            new_highlights,
-            "Featured/highlighted publications with custom images and descriptions\n# This file is manually maintained and won't be overwritten by auto-generation"
-        )
+        service.reorder(new_indices)
         console.print("[green]Highlights reordered![/green]")
 
     except (ValueError, IndexError) as e:
         console.print(f"[red]Invalid order: {e}[/red]")
 
 
-def edit_highlight(highlights):
+def edit_highlight(service):
     """Edit a highlight's description or image"""
+    highlights = service.highlights
     if not highlights:
         console.print("[yellow]No highlights to edit.[/yellow]")
         return
@@ -439,11 +599,7 @@ def edit_highlight(highlights):
     elif "image" in highlight:
         del highlight["image"]
 
-    save_yaml(
-        HIGHLIGHTS_FILE,
-        highlights,
-        "Featured/highlighted publications with custom images and descriptions\n# This file is manually maintained and won't be overwritten by auto-generation"
-    )
+    service.save()
     console.print("[green]Highlight updated![/green]")
 
 
@@ -451,14 +607,28 @@ def edit_highlight(highlights):
 # TEAM MEMBER MANAGEMENT
 # ============================================================================
 
+def load_member_index():
+    """Load index of members, only re-parsing member files that changed since last load"""
+    try:
+        from members import MemberIndex
+    except ImportError as e:
+        console.print(f"[red]Missing citation dependencies ({e}). Install with:[/red]")
+        console.print("  pip install -r _cite/requirements.txt")
+        return None
+    return MemberIndex.load(PROJECT_ROOT, MEMBERS_DIR.name)
+
+
 def manage_team_menu():
     """Show guidelines for managing team members"""
     console.print(Panel("[bold]Team Member Management[/bold]", style="green"))
 
-    # Show current members count
-    members = list(MEMBERS_DIR.glob("*.md"))
-    alumni = list(ALUMNI_DIR.glob("*.md")) if ALUMNI_DIR.exists() else []
+    index = load_member_index()
+    if index is None:
+        return
+    members = index.current()
+    alumni = index.alumni()
 
+    # Show current members count
     console.print(f"\n[bold]Current Team:[/bold] {len(members)} members")
     console.print(f"[bold]Alumni:[/bold] {len(alumni)} members")
 
@@ -484,6 +654,8 @@ role: phd  # options: phd, postdoc, masters, undergrad, visiting, programmer
 links:
   email: email@ucl.ac.uk
   home-page: https://example.com  # optional
+  orcid: 0000-0000-0000-0000  # optional, to fetch their publications
+  dblp: 123/4567  # optional, DBLP PID, to fetch their publications
 ---
 
 Biography text goes here.[/dim]
@@ -507,8 +679,19 @@ Updated biography mentioning their time at the lab and current position.[/dim]
     console.print("  • Simply edit the .md file directly in your editor")
 
     console.print("\n[bold]📋 Current Members:[/bold]")
-    for member_file in sorted(members):
-        console.print(f"  • [dim]{member_file.name}[/dim]")
+    table = Table()
+    table.add_column("Name", style="white")
+    table.add_column("Role", style="cyan")
+    table.add_column("File", style="dim")
+    table.add_column("ORCID", style="green")
+    for member in members:
+        table.add_row(
+            member.get("name", "Unnamed"),
+            member.get("role", ""),
+            f"{member['slug']}.md",
+            str((member.get("links") or {}).get("orcid", "") or ""),
+        )
+    console.print(table)
 
     console.print("\n[dim]Press Enter to return to main menu...[/dim]")
     input()
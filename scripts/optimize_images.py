@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Image Optimization Script
+
+Generates resized WebP/AVIF variants and thumbnails of every image referenced
+by citations, highlights, sources and member pages, and writes a manifest
+(_data/images.yaml) that templates use to build responsive srcsets.
+
+Images are processed in parallel, and images whose contents haven't changed
+since the last run are skipped.
+
+Usage:
+    python scripts/optimize_images.py [--force] [--workers N]
+
+Requirements:
+    pip install pyyaml pillow
+"""
+
+import os
+import sys
+import re
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import yaml
+from yaml.loader import SafeLoader
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    print("Missing dependencies. Install with:")
+    print("  pip install pillow")
+    sys.exit(1)
+
+
+# Paths relative to project root
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "_data"
+MEMBERS_DIR = PROJECT_ROOT / "_members"
+OUTPUT_DIR = PROJECT_ROOT / "images" / "optimized"
+MANIFEST_FILE = DATA_DIR / "images.yaml"
+
+# Data files whose entries may have an "image" field
+IMAGE_DATA_FILES = ["citations.yaml", "highlights.yaml", "sources.yaml"]
+
+# Image types that can be optimized (others, e.g. SVG, are left as is)
+RASTER_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Widths of responsive variants (never larger than original) and thumbnail
+VARIANT_WIDTHS = [400, 800, 1600]
+THUMBNAIL_WIDTH = 200
+
+# Encoder quality per format
+QUALITY = {"webp": 80, "avif": 60}
+
+
+def load_yaml(path):
+    """Load YAML file safely"""
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf8") as f:
+        data = yaml.load(f, Loader=SafeLoader)
+        return data if data else []
+
+
+def load_front_matter(path):
+    """Load YAML front matter at top of markdown file"""
+    text = path.read_text(encoding="utf8")
+    match = re.match(r"\A---\s*\n(.*?)\n---\s*(\n|\Z)", text, re.DOTALL)
+    if not match:
+        return {}
+    data = yaml.load(match.group(1), Loader=SafeLoader)
+    return data if isinstance(data, dict) else {}
+
+
+def referenced_images():
+    """Get local raster image paths referenced by data files and member pages"""
+    images = []
+    for name in IMAGE_DATA_FILES:
+        for entry in load_yaml(DATA_DIR / name):
+            if isinstance(entry, dict) and entry.get("image"):
+                images.append(entry["image"])
+    for path in sorted(MEMBERS_DIR.glob("**/*.md")):
+        image = load_front_matter(path).get("image")
+        if image:
+            images.append(image)
+
+    # Keep local raster images that exist, once each, in order
+    found = {}
+    for image in images:
+        image = str(image).lstrip("/")
+        if "://" in image or Path(image).suffix.lower() not in RASTER_SUFFIXES:
+            continue
+        if (PROJECT_ROOT / image).is_file():
+            found.setdefault(image, None)
+    return list(found)
+
+
+def file_hash(path):
+    """Hash of file contents, to tell if image changed since last run"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def output_formats():
+    """Formats this Pillow build can write, best compression first"""
+    return [f for f in ["avif", "webp"] if features.check(f)]
+
+
+def optimize_image(image, digest, formats):
+    """Write resized variants and thumbnail of one image, returning its manifest entry"""
+    source = PROJECT_ROOT / image
+    stem = f"{Path(image).stem}-{digest[:8]}"
+
+    with Image.open(source) as original:
+        # Apply camera orientation, and keep transparency where present
+        original = ImageOps.exif_transpose(original)
+        mode = "RGBA" if "A" in original.getbands() or "transparency" in original.info else "RGB"
+        original = original.convert(mode)
+        width, height = original.size
+
+        widths = sorted({min(w, width) for w in VARIANT_WIDTHS})
+
+        entry = {"hash": digest, "width": width, "height": height}
+        for fmt in formats:
+            variants = []
+            for w in widths:
+                path = OUTPUT_DIR / f"{stem}-{w}.{fmt}"
+                resized = original.resize((w, round(height * w / width)), Image.LANCZOS)
+                resized.save(path, fmt.upper(), quality=QUALITY[fmt])
+                variants.append({"src": path.relative_to(PROJECT_ROOT).as_posix(), "width": w})
+            entry[fmt] = variants
+
+        # Small preview, e.g. for portraits and lists
+        w = min(THUMBNAIL_WIDTH, width)
+        path = OUTPUT_DIR / f"{stem}-thumb.webp"
+        original.resize((w, round(height * w / width)), Image.LANCZOS).save(
+            path, "WEBP", quality=QUALITY["webp"]
+        )
+        entry["thumbnail"] = path.relative_to(PROJECT_ROOT).as_posix()
+
+    return entry
+
+
+def entry_files(entry):
+    """Output files of manifest entry"""
+    files = [entry.get("thumbnail")]
+    for fmt in QUALITY:
+        files += [variant["src"] for variant in entry.get(fmt, [])]
+    return [f for f in files if f]
+
+
+def is_current(entry, digest, formats):
+    """Whether manifest entry is for same image contents and all its files exist"""
+    return (
+        entry.get("hash") == digest
+        and all(fmt in entry for fmt in formats)
+        and all((PROJECT_ROOT / f).is_file() for f in entry_files(entry))
+    )
+
+
+def optimize_images(force=False, workers=None):
+    """Optimize all referenced images that changed since last run, and update manifest"""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    previous = load_yaml(MANIFEST_FILE)
+    previous = previous if isinstance(previous, dict) else {}
+    formats = output_formats()
+    images = referenced_images()
+
+    # Skip images whose contents haven't changed
+    manifest, pending = {}, {}
+    for image in images:
+        digest = file_hash(PROJECT_ROOT / image)
+        entry = previous.get(image, {})
+        if not force and is_current(entry, digest, formats):
+            manifest[image] = entry
+        else:
+            pending[image] = digest
+
+    print(f"{len(images)} image(s) referenced, {len(pending)} to optimize")
+
+    # Encode changed images across all cores
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(optimize_image, image, digest, formats): image
+            for image, digest in pending.items()
+        }
+        for future in as_completed(futures):
+            image = futures[future]
+            try:
+                manifest[image] = future.result()
+                print(f"  Optimized {image}")
+            except Exception as e:
+                errors.append(image)
+                print(f"  Couldn't optimize {image}: {e}")
+                # Keep serving variants from last run, so they aren't removed below
+                if image in previous:
+                    manifest[image] = previous[image]
+
+    # Remove variants no longer in manifest
+    keep = {f for entry in manifest.values() for f in entry_files(entry)}
+    for path in OUTPUT_DIR.glob("*"):
+        if path.relative_to(PROJECT_ROOT).as_posix() not in keep:
+            path.unlink()
+
+    # Write manifest in same order as images referenced
+    manifest = {image: manifest[image] for image in images if image in manifest}
+    yaml.Dumper.ignore_aliases = lambda *args: True
+    with open(MANIFEST_FILE, "w", encoding="utf8") as f:
+        f.write("# DO NOT EDIT, GENERATED AUTOMATICALLY\n\n")
+        yaml.dump(manifest, f, default_flow_style=False, sort_keys=False)
+
+    return manifest, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate optimized variants of referenced images"
+    )
+    parser.add_argument(
+        "--force", "-f",
+        action="store_true",
+        help="Regenerate all variants, even for unchanged images"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of images to process in parallel"
+    )
+
+    args = parser.parse_args()
+
+    manifest, errors = optimize_images(force=args.force, workers=args.workers)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()